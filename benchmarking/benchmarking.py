@@ -1,6 +1,24 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 import yaml
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'main'))
+
+import telemetry
+from agent import NFLAgent
+from llm import OllamaBackend, OpenAIBackend
+from scrapers.sleeper import get_league_info
 
-from main.agent import NFLAgent
+BENCHMARK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark.yaml')
 
 
 def load_benchmark(file_path):
@@ -15,6 +33,23 @@ def print_benchmark(benchmark_data):
             print(f"  A: {qa['answer']}")
         print()
 
+def basic_llama(input, expected_answer):
+    """Baseline without tools or league context, asks the model directly through an OpenAI-compatible API."""
+    from openai import OpenAI
+
+    load_dotenv()
+    client = OpenAI(base_url=os.getenv("URL"), api_key=os.getenv("KEY"))
+    response = client.chat.completions.create(
+        model="meta-llama/Meta-Llama-3.1-8B-Instruct",
+        messages=[
+            {"role": "user", "content": input},
+        ],
+    )
+
+    print(expected_answer, response.choices[0].message.content, expected_answer.upper() in response.choices[0].message.content.upper())
+
+    return expected_answer.upper() in response.choices[0].message.content.upper()
+
 def calculate_accuracy(benchmark_data, nfl_interface):
     total_questions = 0
     correct_answers = 0
@@ -31,11 +66,161 @@ def calculate_accuracy(benchmark_data, nfl_interface):
     accuracy = (correct_answers / total_questions) * 100
     return accuracy
 
+def iter_questions(benchmark_data):
+    """Yield (question id, category, qa pair) for every question, ids are stable across runs."""
+    for category, qa_pairs in benchmark_data.items():
+        for idx, qa in enumerate(qa_pairs):
+            yield f"{category}:{idx}", category, qa
+
+
+def load_checkpoint(path):
+    """Read the results already written to a checkpoint file, keyed by question id."""
+    results = {}
+    if path and os.path.exists(path):
+        with open(path, 'r') as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    result = json.loads(line)
+                    results[result['id']] = result
+    return results
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def summarize(results):
+    """
+    Aggregate benchmark results
+
+    Args:
+        results (list): Result records written by run_benchmark
+
+    Returns:
+        A dictionary with overall and per-category accuracy, latency percentiles and mean tool calls and tokens.
+    """
+    by_category = {}
+    for result in results:
+        by_category.setdefault(result['category'], []).append(result)
+
+    latencies = [result['latency'] for result in results if result.get('error') is None]
+    return {
+        'questions': len(results),
+        'errors': sum(result.get('error') is not None for result in results),
+        'accuracy': 100 * sum(result['correct'] for result in results) / max(len(results), 1),
+        'categories': {
+            category: 100 * sum(result['correct'] for result in category_results) / len(category_results)
+            for category, category_results in by_category.items()
+        },
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+        'mean_tool_calls': float(np.mean([result['tool_calls'] for result in results])) if results else 0.0,
+        'mean_prompt_tokens': float(np.mean([result['prompt_tokens'] for result in results])) if results else 0.0,
+        'mean_completion_tokens': float(np.mean([result['completion_tokens'] for result in results])) if results else 0.0,
+    }
+
+
+def run_benchmark(benchmark_data, agent_factory, workers=4, checkpoint=None, verbose=False):
+    """
+    Run every benchmark question over a pool of workers
+
+    Each worker thread gets its own agent from agent_factory, since an agent keeps
+    the conversation in self.messages. Every finished question is appended to the
+    checkpoint file, and questions already in it are skipped, so an interrupted
+    run picks up where it stopped.
+
+    Args:
+        benchmark_data: Categories mapped to lists of question/answer pairs.
+        agent_factory: Callable returning a new NFLAgent.
+        workers: Number of questions asked concurrently.
+        checkpoint: Path of the JSONL results file, or None to keep results in memory only.
+
+    Returns:
+        A list with one result record per question.
+    """
+    results = load_checkpoint(checkpoint)
+    pending = [item for item in iter_questions(benchmark_data) if item[0] not in results]
+    print(f"{len(results)} questions already answered, {len(pending)} to go")
+
+    local = threading.local()
+    write_lock = threading.Lock()
+
+    def ask(question_id, category, qa):
+        if not hasattr(local, 'agent'):
+            local.agent = agent_factory()
+        agent = local.agent
+        result = {'id': question_id, 'category': category, 'question': qa['question'], 'expected': qa['answer'],
+                  'response': None, 'correct': False, 'error': None}
+        start = time.perf_counter()
+        try:
+            result['response'] = agent.run(qa['question'], verbose)
+            result['correct'] = qa['answer'].upper() in result['response'].upper()
+        except Exception as e:
+            result['error'] = repr(e)
+        finally:
+            result['latency'] = time.perf_counter() - start
+            result.update({key: agent.last_turn.get(key, 0) for key in ('rounds', 'tool_calls', 'prompt_tokens', 'completion_tokens')})
+            agent.reset()
+        return result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(ask, *item) for item in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result['id']] = result
+            if checkpoint:
+                with write_lock, open(checkpoint, 'a') as file:
+                    file.write(json.dumps(result) + '\n')
+            print(f"[{len(results)}] {result['id']} correct={result['correct']} {result['latency']:.2f}s")
+
+    if pending:
+        elapsed = time.perf_counter() - started
+        print(f"Answered {len(pending)} questions in {elapsed:.1f}s ({len(pending) / elapsed:.2f} questions/s)")
+    return list(results.values())
+
+
+def print_summary(summary):
+    print(f"Accuracy: {summary['accuracy']:.2f}% over {summary['questions']} questions ({summary['errors']} errors)")
+    for category, accuracy in summary['categories'].items():
+        print(f"  {category}: {accuracy:.2f}%")
+    print(f"Latency p50 {summary['latency_p50']:.2f}s, p95 {summary['latency_p95']:.2f}s, p99 {summary['latency_p99']:.2f}s")
+    print(f"Per question: {summary['mean_tool_calls']:.2f} tool calls, "
+          f"{summary['mean_prompt_tokens']:.0f} prompt tokens, {summary['mean_completion_tokens']:.0f} completion tokens")
+
+
 if __name__ == "__main__":
-    benchmark_file = '../benchmarking/benchmark.yaml'
-    benchmark_data = load_benchmark(benchmark_file)
-    print_benchmark(benchmark_data)
+    parser = argparse.ArgumentParser(description="Run the fantasy football benchmark against the agent")
+    parser.add_argument('--workers', type=int, default=4, help='Questions asked concurrently')
+    parser.add_argument('--checkpoint', default='benchmark_results.jsonl', help='JSONL file results are appended to')
+    parser.add_argument('--backend', choices=['ollama', 'openai'], default='ollama')
+    parser.add_argument('--model', default=None, help='Model name, defaults to the backend default')
+    parser.add_argument('--base-url', default=None, help='Url of the OpenAI-compatible server')
+    parser.add_argument('--no-league', action='store_true', help='Skip fetching the Sleeper league context')
+    parser.add_argument('--trace', default=None, help='JSONL file every LLM, tool and fetch span is appended to')
+    parser.add_argument('--metrics', action='store_true', help='Print the Prometheus metrics after the run')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    telemetry.configure(args.trace)
+    load_dotenv()
+    benchmark_data = load_benchmark(BENCHMARK_FILE)
+
+    # Fetch the league once and share it with every worker's agent
+    league_context = "" if args.no_league else get_league_info()
+
+    def agent_factory():
+        if args.backend == 'openai':
+            backend = OpenAIBackend(args.model or "meta-llama/Meta-Llama-3.1-8B-Instruct", base_url=args.base_url)
+        else:
+            backend = OllamaBackend(args.model) if args.model else OllamaBackend()
+        # No answer cache, every question has to reach the model
+        return NFLAgent(league_context=league_context, backend=backend, answer_cache=None)
 
-    nfl_interface = NFLAgent()
-    accuracy = calculate_accuracy(benchmark_data, nfl_interface)
-    print(f"Accuracy: {accuracy:.2f}%")
+    results = run_benchmark(benchmark_data, agent_factory, workers=args.workers, checkpoint=args.checkpoint, verbose=args.verbose)
+    print_summary(summarize(results))
+    if args.metrics:
+        print(telemetry.render_metrics())
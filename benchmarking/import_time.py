@@ -0,0 +1,72 @@
+"""
+Reports how long importing a module takes, broken down by the modules it pulls in
+
+Usage: python import_time.py [module] [--budget SECONDS] [--top N]
+
+Runs a fresh interpreter with -X importtime from the main directory and exits
+with status 1 when the total import time is over the budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'main')
+
+
+def measure_imports(module):
+    """
+    Imports a module in a fresh interpreter and collects -X importtime output
+
+    Args:
+        module (str): The module to import, relative to the main directory
+
+    Returns:
+        list: (module name, self seconds, cumulative seconds, depth) tuples in import order
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=MAIN_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('module', nargs='?', default='agent')
+    parser.add_argument('--budget', type=float, default=1.0, help='Maximum import time in seconds')
+    parser.add_argument('--top', type=int, default=15, help='Number of top-level imports to list')
+    args = parser.parse_args()
+
+    timings = measure_imports(args.module)
+    end = max(idx for idx, (name, _, _, depth) in enumerate(timings) if name == args.module and depth == 0)
+    total = timings[end][2]
+
+    # Children are listed before their parent, walk back to the previous top-level import
+    top_level = []
+    for name, _, cumulative, depth in reversed(timings[:end]):
+        if depth == 0:
+            break
+        if depth == 1:
+            top_level.append((name, cumulative))
+    top_level.sort(key=lambda item: -item[1])
+
+    print(f"import {args.module}: {total:.3f}s (budget {args.budget:.3f}s)")
+    for name, cumulative in top_level[:args.top]:
+        print(f"  {cumulative:8.3f}s  {name}")
+
+    sys.exit(0 if total <= args.budget else 1)
+
+
+if __name__ == '__main__':
+    main()
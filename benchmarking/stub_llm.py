@@ -0,0 +1,80 @@
+"""
+Minimal OpenAI-compatible chat completions server for running the benchmark offline
+
+Usage: python stub_llm.py [--port 8001] [--delay 0.2]
+
+Answers every question with the first option of "either 'X' or 'Y'" (or "yes"),
+never calls tools, and supports both streaming and non-streaming requests.
+Point the benchmark at it with --backend openai --base-url http://127.0.0.1:8001/v1.
+"""
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OPTION_PATTERN = re.compile(r"either\s+(?:with\s+)?'([^']+)'\s+or\s+'([^']+)'", re.IGNORECASE)
+
+
+def stub_answer(messages):
+    question = next((m.get('content') or '' for m in reversed(messages) if m.get('role') == 'user'), '')
+    match = OPTION_PATTERN.search(question)
+    return match.group(1) if match else 'yes'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        time.sleep(self.delay)
+
+        answer = stub_answer(request.get('messages', []))
+        prompt_tokens = sum(len(str(m.get('content') or '')) for m in request.get('messages', [])) // 4
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': 1, 'total_tokens': prompt_tokens + 1}
+        base = {'id': 'chatcmpl-stub', 'created': int(time.time()), 'model': request.get('model', 'stub')}
+
+        if request.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            chunks = [
+                dict(base, object='chat.completion.chunk', choices=[{'index': 0, 'delta': {'role': 'assistant', 'content': answer}, 'finish_reason': None}]),
+                dict(base, object='chat.completion.chunk', choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]),
+                dict(base, object='chat.completion.chunk', choices=[], usage=usage),
+            ]
+            for chunk in chunks:
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        body = dict(base, object='chat.completion', usage=usage, choices=[
+            {'index': 0, 'message': {'role': 'assistant', 'content': answer}, 'finish_reason': 'stop'},
+        ])
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=8001, delay=0.0):
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    print(f"Stub LLM listening on http://127.0.0.1:{server.server_port}/v1")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before answering')
+    args = parser.parse_args()
+    serve(args.port, args.delay)
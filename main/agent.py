@@ -1,30 +1,27 @@
-import json
-import os
-
-import nfl_data_py as nfl
-import yaml
-from dotenv import load_dotenv
-from ollama import ChatResponse
-from ollama import chat
-from openai import OpenAI
-
-from tools.fantasycalc import get_value, get_value_tool
-from tools.nflstats import get_nfl_stats, get_nfl_stats_tool
-from tools.sleeper import get_player_projected_points, get_player_projected_points_tool
-from tools.sleeper import get_player_total_projected_points
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+
+import telemetry
+from answer_cache import answer_cache as shared_answer_cache
+from conversation import CONTEXT_BUDGET, Conversation
+from llm import OllamaBackend
+
+from tools.fantasycalc import get_trade_suggestions, get_value, get_value_tool, get_values
+from tools.memo import tool_memo
+from tools.schedule import get_schedule_difficulty
+from tools.nflstats import compare_players, get_nfl_stats, get_nfl_stats_tool
+from tools.sleeper import get_player_projected_points, get_player_projected_points_tool, get_optimal_lineup, get_playoff_odds, get_rest_of_season_projections, get_waiver_targets
 from scrapers.sleeper import get_league_info
 
+logger = logging.getLogger(__name__)
+
 # TODO:
 # presentation, streamlit app
 # get benchmarking working 
 # ideas, average stats out in the past few game, 
 # give llm the future schedule with projected points and schedule difficulty
 
-load_dotenv()
-
-stats = nfl.import_weekly_data([2024])
-ids = nfl.import_ids()
-
 TOOL_SYSTEM_PROMT = """
 You are a bot whose job is to provide an LLM with the data it needs to make informed decisions about fantasy football. 
 You are given a prompt and should call the appropriate tools to provide the necessary information.
@@ -39,7 +36,7 @@ For the get_player_projected_points tool, make sure to provide week numbers as a
 """
 
 
-SYSTEM_PROMPT = """
+BASE_SYSTEM_PROMPT = """
 You are a knowledgeable fantasy football assistant. You have been given a prompt and tools to help answer the user's question.
 
 Always answer the user's question to the best of your ability.
@@ -58,115 +55,213 @@ Use the Sleeper league information to provide context about the league the user
 Respond to the user with a human readable and informative response.
 """
 # Use the Sleeper league information to provide context about the league the user is in. Always give advice in the perspective of the user and their opponents.
-SYSTEM_PROMPT += get_league_info()
 
+
+def get_system_prompt(league_context=None):
+    """System prompt for a league, defaults to the league and team in globals (fetched on first use)."""
+    if league_context is None:
+        league_context = get_league_info()
+    return BASE_SYSTEM_PROMPT + league_context
+
+
+# Memoized, the model often asks for the same player more than once in a conversation
 available_functions = {
-    'get_value': get_value,
-    'get_nfl_stats': get_nfl_stats,
-    'get_player_projected_points': get_player_projected_points,
+    'get_value': tool_memo.wrap(get_value),
+    'get_values': tool_memo.wrap(get_values),
+    'get_nfl_stats': tool_memo.wrap(get_nfl_stats),
+    'compare_players': tool_memo.wrap(compare_players),
+    'get_player_projected_points': tool_memo.wrap(get_player_projected_points),
+    'get_rest_of_season_projections': tool_memo.wrap(get_rest_of_season_projections),
+    'get_schedule_difficulty': tool_memo.wrap(get_schedule_difficulty),
+    # Not memoized, they depend on the league's rosters rather than the data snapshot
+    'get_waiver_targets': get_waiver_targets,
+    'get_optimal_lineup': get_optimal_lineup,
+    'get_playoff_odds': get_playoff_odds,
+    'get_trade_suggestions': get_trade_suggestions,
 }
+tools = list(available_functions.values())
+
+MAX_TOOL_ROUNDS = 4
+TOOL_TIMEOUT = 30
+TURN_BUDGET = 120
+
+# Shared by every agent, tool calls from one round run concurrently
+tool_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='tool')
+
+
+def call_tool(name, arguments):
+    """Run a tool by name, turning failures into a message the model can read."""
+    function_to_call = available_functions.get(name)
+    if function_to_call is None:
+        return f"Function {name} not found"
+    with telemetry.span('tool', name, arguments=arguments) as span:
+        try:
+            output = function_to_call(**(arguments or {}))
+        except Exception as e:
+            logger.warning("Tool %s failed with %s: %s", name, arguments, e)
+            span.set(failed=repr(e))
+            return f"Function {name} failed: {e}"
+        span.set(bytes=len(str(output)))
+        return output
+
 
 class NFLAgent:
-    def __init__(self):
-        self.messages = [{
-                            'role': 'system',
-                            'content': SYSTEM_PROMPT,
-                            }]
-        
-    def run(self, prompt, verbose=False):
-        self.messages.append({'role': 'user', 'content': prompt})
-        response: ChatResponse = chat(
-            model='llama3.1',
-            messages=self.messages,
-            tools=[get_value, get_nfl_stats, get_player_projected_points],
-        )
-
-        if response.message.tool_calls:
-            # There may be multiple tool calls in the response
-            for tool in response.message.tool_calls:
-                # Ensure the function is available, and then call it
-                if function_to_call := available_functions.get(tool.function.name):
-                    output = function_to_call(**tool.function.arguments)
-                    if verbose:
-                        print('Calling function:', tool.function.name)
-                        print('Arguments:', tool.function.arguments)
-                        print('Function output:', output)
-                    self.messages.append({'role': 'tool', 'content': str(output), 'name': tool.function.name})
+    def __init__(self, league_context=None, backend=None, max_rounds=MAX_TOOL_ROUNDS, tool_timeout=TOOL_TIMEOUT, turn_budget=TURN_BUDGET,
+                 context_budget=CONTEXT_BUDGET, answer_cache=shared_answer_cache):
+        # league_context is the description from get_league_context, defaults to the league in globals
+        self.system_prompt = get_system_prompt(league_context)
+        self.backend = backend or OllamaBackend()
+        self.max_rounds = max_rounds
+        self.tool_timeout = tool_timeout
+        self.turn_budget = turn_budget
+        self.last_turn = {}
+        # Set answer_cache to None to always ask the model, e.g. when benchmarking it
+        self.answer_cache = answer_cache
+        # Keeps the prompt under context_budget tokens, the system prompt is its stable prefix
+        self.conversation = Conversation(self.system_prompt, context_budget)
+
+    @property
+    def messages(self):
+        return self.conversation.messages
+
+    def run_tools(self, tool_calls, deadline, verbose=False, parent=None):
+        """
+        Runs the tool calls of one model response concurrently
+
+        Each call gets at most tool_timeout seconds and none may run past the turn
+        deadline. A call that does not finish in time is reported to the model as
+        timed out. The tool spans are recorded as children of parent.
+
+        Yields:
+            dict: A {'type': 'tool', 'status': 'done'} event as each call finishes,
+            then one {'type': 'tool_messages'} event with a message per call, in call order
+        """
+        # Each call runs in its own copy of the context so its spans join the turn's trace
+        futures = {
+            tool_executor.submit(telemetry.context_for(parent).run, call_tool, call.name, call.arguments): idx
+            for idx, call in enumerate(tool_calls)
+        }
+        outputs = [None] * len(tool_calls)
+        timeout = max(0, min(self.tool_timeout, deadline - time.monotonic()))
+
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                idx = futures[future]
+                outputs[idx] = future.result()
+                yield {'type': 'tool', 'status': 'done', 'name': tool_calls[idx].name, 'arguments': tool_calls[idx].arguments}
+        except TimeoutError:
+            for future, idx in futures.items():
+                if not future.done():
+                    future.cancel()
+                    outputs[idx] = f"Function {tool_calls[idx].name} timed out"
+                    yield {'type': 'tool', 'status': 'timeout', 'name': tool_calls[idx].name, 'arguments': tool_calls[idx].arguments}
+
+        if verbose:
+            for call, output in zip(tool_calls, outputs):
+                logger.info("Called %s with %s: %s", call.name, call.arguments, output)
+        yield {'type': 'tool_messages', 'messages': [self.backend.tool_message(call, output) for call, output in zip(tool_calls, outputs)]}
+
+    def run_stream(self, prompt, verbose=False):
+        """
+        Answers a prompt, yielding progress while it works
+
+        Yields:
+            dict: {'type': 'tool', ...} events while tools run, {'type': 'token', 'content': str}
+            events as the answer is generated and a final {'type': 'done', 'content': str}
+        """
+        self.conversation.start_turn(prompt)
+        deadline = time.monotonic() + self.turn_budget
+        # Counters of the current turn, read by the benchmark runner
+        self.last_turn = {'rounds': 0, 'tool_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached': False}
+        # The llm and tool spans of this turn are its children, they share one trace
+        turn = telemetry.Span('turn', parent=telemetry.current_span())
+
+        cache_entry = None
+        if self.answer_cache is not None:
+            with telemetry.span('answer_cache', parent=turn) as span:
+                cache_entry = self.answer_cache.lookup_key(prompt)
+                answer = self.answer_cache.get(*cache_entry) if cache_entry else None
+                span.set(cache='hit' if answer is not None else 'miss' if cache_entry else 'skip')
+            if answer is not None:
+                self.last_turn['cached'] = True
+                self.conversation.end_turn(answer)
+                turn.set(**self.last_turn)
+                telemetry.finish(turn)
+                yield {'type': 'token', 'content': answer}
+                yield {'type': 'done', 'content': answer}
+                return
+        # An answer built on timed out tools is not worth reusing
+        complete = True
+
+        # Keep answering tool calls until the model stops asking or the round/time budget runs out,
+        # the last round gets no tools so the model has to answer with the function outputs so far
+        for round_number in range(self.max_rounds + 1):
+            final_round = round_number == self.max_rounds or time.monotonic() >= deadline
+            message = None
+            llm_started = time.perf_counter()
+            first_token = None
+            self.conversation.fit()
+            for event in self.backend.stream(self.conversation.messages, None if final_round else tools):
+                if event['type'] == 'token':
+                    first_token = first_token or time.perf_counter() - llm_started
+                    yield event
                 else:
-                    print('Function', tool.function.name, 'not found')
+                    message = event
+            usage = message['usage']
+            telemetry.record(
+                'llm', time.perf_counter() - llm_started, getattr(self.backend, 'model', None), parent=turn,
+                round=round_number, first_token=first_token, tool_calls=len(message['tool_calls']),
+                prompt_tokens=usage.get('prompt_tokens', 0), completion_tokens=usage.get('completion_tokens', 0),
+            )
+            self.last_turn['rounds'] += 1
+            self.last_turn['prompt_tokens'] += usage.get('prompt_tokens', 0)
+            self.last_turn['completion_tokens'] += usage.get('completion_tokens', 0)
+
+            if not message['tool_calls']:
+                break
+
+            self.last_turn['tool_calls'] += len(message['tool_calls'])
+            self.conversation.append(self.backend.assistant_message(message['content'], message['tool_calls']))
+            for call in message['tool_calls']:
+                yield {'type': 'tool', 'status': 'started', 'name': call.name, 'arguments': call.arguments}
+            for event in self.run_tools(message['tool_calls'], deadline, verbose, parent=turn):
+                if event['type'] == 'tool_messages':
+                    self.conversation.extend(event['messages'])
+                else:
+                    complete = complete and event['status'] != 'timeout'
+                    yield event
 
-        if verbose:    
-            print(self.messages)
+        logger.debug("Messages: %s", self.messages)
 
-        # Get final response from model with function outputs
-        final_response = chat('llama3.1', messages=self.messages, tools=[get_value, get_nfl_stats, get_player_projected_points])
-        self.messages.append({'role': 'system', 'content': final_response.message.content})
+        self.conversation.end_turn(message['content'])
+        if cache_entry and complete and message['content']:
+            self.answer_cache.put(*cache_entry, message['content'])
+        turn.set(context_tokens=self.conversation.tokens(), **self.last_turn)
+        telemetry.finish(turn)
         if verbose:
-            print('Final response:', final_response.message.content)
-        return final_response.message.content
+            logger.info("Final response: %s", message['content'])
+        yield {'type': 'done', 'content': message['content']}
+
+    def run(self, prompt, verbose=False):
+        for event in self.run_stream(prompt, verbose):
+            if event['type'] == 'done':
+                return event['content']
     
     def reset(self):
-        self.messages = [{
-                            'role': 'system',
-                            'content': SYSTEM_PROMPT,
-                            }]
+        self.conversation.clear()
         
     def test_interface(self, user_input, expected_output, verbose=False):
         response = self.run(user_input, verbose)
-        print(user_input, "\n")
-        print("Expected: " + expected_output, " Actual: " + response, expected_output.upper() in response.upper())
-        print("\n")
+        logger.info("%s\nExpected: %s  Actual: %s %s", user_input, expected_output, response, expected_output.upper() in response.upper())
         self.reset()
         return expected_output.upper() in response.upper()
-    
-
-nfl_agent = NFLAgent()
-# nfl_agent.run_openai("Should I start Tyreek Hill or a kicker this week? You must respond with only one word, either 'Hill' or 'kicker'")
-
-def load_benchmark(file_path):
-    with open(file_path, 'r') as file:
-        return yaml.safe_load(file)
-
-benchmark_file = '../benchmarking/benchmark.yaml'
-benchmark_data = load_benchmark(benchmark_file)
-
-client = OpenAI(base_url=os.getenv("URL"), api_key=os.getenv("KEY"))
-
-def basic_llama(input, expected_answer):
-    response = client.chat.completions.create(
-        model="meta-llama/Meta-Llama-3.1-8B-Instruct",
-        messages=[
-            {"role": "user", "content": input},
-        ],
-    )
-
-    print(expected_answer, response.choices[0].message.content, expected_answer.upper() in response.choices[0].message.content.upper())
-
-    return expected_answer.upper() in response.choices[0].message.content.upper()
-
-def calculate_accuracy(benchmark_data, test_func):
-    total_questions = 0
-    correct_answers = 0
-
-    for category, qa_pairs in benchmark_data.items():
-        for qa in qa_pairs:
-            user_input = qa['question']
-            expected_answer = qa['answer']
-            result = test_func(user_input, expected_answer)
-            if result:
-                correct_answers += 1
-            total_questions += 1
-
-    accuracy = (correct_answers / total_questions) * 100
-    return accuracy
 
-# print(calculate_accuracy(benchmark_data, basic_llama))
-# print(calculate_accuracy(benchmark_data, nfl_agent.test_interface))
-nfl_agent.run("Should I start Jordan Love or Deshaun Watson?", verbose=True)
 
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    nfl_agent = NFLAgent()
+    nfl_agent.run("Should I start Jordan Love or Deshaun Watson?", verbose=True)
 
-# different prompts for 
-#  
 
 # TODO:
 # have two gpts, one that has a different prompt about tooling, and another that has a different prompt about the nfl
@@ -174,4 +269,4 @@ nfl_agent.run("Should I start Jordan Love or Deshaun Watson?", verbose=True)
 
 
 
-# start doing few shot prompting? 
\ No newline at end of file
+# start doing few shot prompting?
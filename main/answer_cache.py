@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import data.names as names
+import globals
+import tools.utils as utils
+from data.versions import data_version
+from scrapers.sleeper import get_league_snapshot
+
+logger = logging.getLogger(__name__)
+
+ANSWER_TTL = 15 * 60
+MAX_ANSWERS = 512
+
+# Words that do not change what is being asked
+_FILLER = {
+    'a', 'an', 'the', 'i', 'me', 'my', 'should', 'would', 'could', 'do', 'does', 'you', 'think',
+    'please', 'hey', 'is', 'it', 'to', 'this', 'week', 'for', 'of', 'in', 'now', 'better', 'right',
+}
+
+
+def question_key(question: str) -> Optional[tuple]:
+    """
+    Normalizes a question so different phrasings of it share a cache key
+
+    Player names are replaced by their canonical ids and filler words are dropped,
+    so "Should I start Jordan Love or Deshaun Watson?" and "start jordan love or
+    deshaun watson" map to the same key.
+
+    Args:
+        question (str): The user's question
+
+    Returns:
+        tuple: (question template, sorted player ids), or None when the question names no
+        player, such questions usually refer back to the conversation
+    """
+    tokens = names.normalize_name(question).split()
+    mentions = names.get_resolver().extract(question)
+    if not mentions:
+        return None
+
+    template = []
+    position = 0
+    for _, start, end in mentions:
+        template += tokens[position:start] + ['<player>']
+        position = end
+    template += tokens[position:]
+    template = ' '.join(token for token in template if token not in _FILLER)
+    player_ids = tuple(sorted(utils.canonical_player_id(name) for name, _, _ in mentions))
+    return template, player_ids
+
+
+def league_state_version() -> tuple:
+    """Gets the version of everything an answer depends on: the league's rosters, the week and the data snapshots."""
+    snapshot = get_league_snapshot(globals.get_league_id())
+    return snapshot.roster_hash, globals.get_week(), data_version()
+
+
+class AnswerCache:
+    """
+    Final answers of the agent, keyed on the normalized question
+
+    An entry is only served while the league state version it was stored with is
+    current and it is younger than the ttl, the least recently used entry goes first
+    when the cache is full.
+
+    Args:
+        maxsize (int): Number of answers kept
+        ttl (float): Seconds an answer is served for
+    """
+
+    def __init__(self, maxsize: int = MAX_ANSWERS, ttl: float = ANSWER_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counters = {'hits': 0, 'misses': 0, 'invalidated': 0}
+
+    def get(self, key, version) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry['version'] != version or time.time() - entry['stored'] > self.ttl):
+                del self._entries[key]
+                self._counters['invalidated'] += 1
+                entry = None
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry['answer']
+
+    def put(self, key, version, answer: str):
+        with self._lock:
+            self._entries[key] = {'version': version, 'stored': time.time(), 'answer': answer}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def lookup_key(self, question: str):
+        """
+        Gets the cache key and current version for a question in the league in globals
+
+        Returns:
+            tuple: (key, version), or None when the question should not be cached
+        """
+        try:
+            normalized = question_key(question)
+            if normalized is None:
+                return None
+            key = (str(globals.get_league_id()), globals.get_team_name().lower()) + normalized
+            return key, league_state_version()
+        except Exception as e:
+            # The cache is an optimization, a failed lookup just means the agent answers
+            logger.warning("Answer cache lookup failed for %r: %s", question, e)
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, size=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every agent in the process, users of the same league ask the same questions
+answer_cache = AnswerCache()
@@ -0,0 +1,113 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_BUDGET = 8000
+# A single tool output above this is cut before it enters the history
+MAX_TOOL_TOKENS = 1500
+# Tool outputs of finished turns are cut down to this
+SUMMARY_TOKENS = 120
+# Eviction brings the history down to this fraction of the budget, so it happens rarely
+LOW_WATER = 0.6
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(message) -> int:
+    """Rough token count of a message or string, about four characters per token."""
+    if isinstance(message, str):
+        return len(message) // CHARS_PER_TOKEN + 1
+    tokens = estimate_tokens(message.get('content') or '')
+    for call in message.get('tool_calls') or []:
+        tokens += estimate_tokens(str(call.get('function', call)))
+    return tokens + 4
+
+
+def truncate(text: str, tokens: int) -> str:
+    """Cuts text down to about the given number of tokens, marking the cut."""
+    text = str(text)
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + f" ...[{len(text) - limit} characters cut]"
+
+
+class Conversation:
+    """
+    The messages sent to the LLM, kept under a token budget
+
+    The system prompt is never changed and finished turns are only rewritten when the
+    history is over budget, so backends that cache the prompt prefix can reuse it
+    from one call to the next. When a turn ends its tool outputs are cut down to
+    short summaries. When the history goes over the budget the tool exchanges of the
+    oldest turns are dropped first, keeping their question and answer, then whole
+    turns. The current turn is never evicted.
+
+    Args:
+        system_prompt (str): The system prompt, the stable prefix of every call
+        budget (int): Estimated prompt tokens the history may use
+        max_tool_tokens (int): Tokens a tool output may use while its turn is running
+        summary_tokens (int): Tokens a tool output keeps once its turn is over
+    """
+
+    def __init__(self, system_prompt: str, budget: int = CONTEXT_BUDGET, max_tool_tokens: int = MAX_TOOL_TOKENS,
+                 summary_tokens: int = SUMMARY_TOKENS):
+        self.system_message = {'role': 'system', 'content': system_prompt}
+        self.budget = budget
+        self.max_tool_tokens = max_tool_tokens
+        self.summary_tokens = summary_tokens
+        # One list of messages per turn, the last one is the turn in progress
+        self.turns = []
+
+    @property
+    def messages(self) -> list:
+        return [self.system_message] + [message for turn in self.turns for message in turn]
+
+    def tokens(self) -> int:
+        return sum(estimate_tokens(message) for message in self.messages)
+
+    def start_turn(self, prompt: str):
+        self.turns.append([{'role': 'user', 'content': prompt}])
+        self.fit()
+
+    def append(self, message: dict):
+        if message.get('role') == 'tool':
+            message = dict(message, content=truncate(message['content'], self.max_tool_tokens))
+        self.turns[-1].append(message)
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def end_turn(self, answer: str):
+        """Adds the final answer and summarizes the tool outputs of the turn."""
+        turn = self.turns[-1]
+        turn.append({'role': 'assistant', 'content': answer})
+        self.turns[-1] = [
+            dict(message, content=truncate(message['content'], self.summary_tokens)) if message.get('role') == 'tool' else message
+            for message in turn
+        ]
+        self.fit()
+
+    def fit(self):
+        """Evicts old history until the conversation is under the budget, see the class docstring."""
+        total = self.tokens()
+        if total <= self.budget:
+            return
+        target = self.budget * LOW_WATER
+
+        # Keep the question and answer of old turns, their tool calls and outputs go first
+        for idx, turn in enumerate(self.turns[:-1]):
+            if total <= target:
+                break
+            kept = [turn[0], turn[-1]] if len(turn) > 2 else turn
+            total -= sum(estimate_tokens(message) for message in turn) - sum(estimate_tokens(message) for message in kept)
+            self.turns[idx] = kept
+
+        evicted = 0
+        while total > target and len(self.turns) > 1:
+            total -= sum(estimate_tokens(message) for message in self.turns.pop(0))
+            evicted += 1
+        logger.info("Conversation over %d tokens, evicted %d turns, now %d tokens", self.budget, evicted, total)
+
+    def clear(self):
+        self.turns = []
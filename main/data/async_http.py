@@ -0,0 +1,150 @@
+import asyncio
+import random
+import re
+import threading
+
+import httpx
+
+import telemetry
+from data.ratelimit import RateLimiter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='async-http', daemon=True).start()
+        return _loop
+
+
+def run(coro, timeout: float = None):
+    """
+    Runs a coroutine on the shared background event loop and waits for its result
+
+    The loop lives for the whole process, so its connection pool is reused by
+    every synchronous caller, whatever thread it runs on.
+    """
+    # The loop thread has its own context, carry the caller's span over so fetches nest under it
+    coro = telemetry.propagate(coro, telemetry.current_span())
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result(timeout)
+
+
+def endpoint(path: str) -> str:
+    """Gets the path with ids and numbers replaced, used to group requests in the metrics."""
+    return re.sub(r'\d+', ':n', path.lstrip('/'))
+
+
+class AsyncHttpClient:
+    """
+    Pooled asyncio client for JSON endpoints with bounded concurrency, retries and rate limiting
+
+    Responses go through an HttpCache, so fresh entries never hit the network and
+    stale ones are revalidated with a conditional request.
+
+    Args:
+        base_url (str): Prefix of every path
+        http_cache (HttpCache): The response cache
+        concurrency (int): Maximum requests in flight
+        rate (float): Maximum requests started per second
+        retries (int): Attempts after the first one for timeouts, 429 and 5xx responses
+        backoff (float): Base delay in seconds, doubled on every retry
+        timeout (float): Request timeout in seconds
+    """
+
+    def __init__(self, base_url: str, http_cache, concurrency: int = 8, rate: float = 10,
+                 retries: int = 3, backoff: float = 0.5, timeout: float = 30):
+        self.base_url = base_url.rstrip('/')
+        self.http_cache = http_cache
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate, burst=concurrency)
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_client(self):
+        # Created lazily so both are bound to the loop that uses them
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    async def _fetch(self, url: str, params, headers) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            await self.rate_limiter.acquire_async()
+            try:
+                async with self._semaphore:
+                    response = await self._client.get(url, params=params, headers=headers)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+                response = None
+
+            if response is not None and (response.status_code not in RETRY_STATUSES or attempt == self.retries):
+                return response
+
+            delay = self.backoff * 2 ** attempt
+            if response is not None and response.headers.get('Retry-After', '').isdigit():
+                delay = max(delay, int(response.headers['Retry-After']))
+            await asyncio.sleep(delay + random.uniform(0, self.backoff))
+
+    async def get(self, path: str, params=None, cache: bool = True):
+        """
+        Gets a JSON endpoint through the cache
+
+        Args:
+            path (str): The endpoint, relative to base_url
+            params (dict): Query parameters
+            cache (bool): Set to False for payloads the caller persists in its own format
+
+        Returns:
+            The decoded JSON body
+        """
+        self._ensure_client()
+        url = self.url(path)
+        with telemetry.span('http.get', endpoint(path), path=path) as span:
+            if not cache:
+                response = await self._fetch(url, params, {})
+                response.raise_for_status()
+                span.set(cache='bypass', bytes=len(response.content), status=response.status_code)
+                return response.json()
+
+            # Cache files can be megabytes of JSON, keep their I/O off the event loop
+            key, entry, fresh = await asyncio.to_thread(self.http_cache.lookup, url, params)
+            if fresh:
+                span.set(cache='hit')
+                return entry['body']
+
+            try:
+                response = await self._fetch(url, params, self.http_cache.conditional_headers(entry))
+                span.set(status=response.status_code, bytes=len(response.content))
+                if response.status_code == 304 and entry is not None:
+                    span.set(cache='revalidated')
+                    return await asyncio.to_thread(self.http_cache.revalidated, key, entry)
+                response.raise_for_status()
+                body = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                span.set(cache='stale')
+                return self.http_cache.stale(url, entry, e)
+
+            span.set(cache='miss')
+            return await asyncio.to_thread(self.http_cache.store, key, url, body, response.headers)
+
+    async def get_many(self, paths, params=None) -> list:
+        """Gets several endpoints concurrently, results are in the order of the paths."""
+        return await asyncio.gather(*(self.get(path, params) for path in paths))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,102 @@
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("FF_CACHE_DIR", os.path.join(os.path.dirname(__file__), '..', '.cache'))
+# Bump when the layout of cached files changes so old snapshots are ignored
+CACHE_VERSION = 1
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def cache_path(name: str, suffix: str = 'parquet') -> str:
+    """
+    Gets the path of a file in the local cache directory
+
+    Args:
+        name (str): The name of the cached dataset
+        suffix (str): The file extension
+
+    Returns:
+        str: The absolute path of the cache file
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.abspath(os.path.join(CACHE_DIR, f'{name}.{suffix}'))
+
+
+def read_meta(name: str) -> dict:
+    """Read the metadata written next to a cached dataset, or an empty dict if there is none."""
+    try:
+        with open(cache_path(name, 'meta.json'), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_meta(name: str, key: str) -> dict:
+    meta = {'version': CACHE_VERSION, 'key': key, 'created': time.time()}
+    tmp_path = cache_path(name, 'meta.json.tmp')
+    with open(tmp_path, 'w') as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, cache_path(name, 'meta.json'))
+    return meta
+
+
+def is_fresh(meta: dict, key: str, ttl: float) -> bool:
+    """Check that cached metadata matches the current version key and is younger than the ttl."""
+    return (
+        meta.get('version') == CACHE_VERSION
+        and meta.get('key') == key
+        and time.time() - meta.get('created', 0) < ttl
+    )
+
+
+def read_frame(name: str, loader, key: str = '', ttl: float = DEFAULT_TTL, refresh: bool = False) -> pd.DataFrame:
+    """
+    Reads a DataFrame from the parquet cache, calling the loader when the cache is missing or stale
+
+    Args:
+        name (str): The name of the cached dataset
+        loader (callable): Function returning a fresh DataFrame, usually a network download
+        key (str): Version key of the dataset, a cache written with a different key is ignored
+        ttl (float): Number of seconds a cached copy stays fresh
+        refresh (bool): Skip the cache and call the loader
+
+    Returns:
+        pd.DataFrame: The cached or freshly loaded data
+    """
+    with telemetry.span('data.load', name) as span:
+        path = cache_path(name)
+        meta = read_meta(name)
+
+        if not refresh and os.path.exists(path) and is_fresh(meta, key, ttl):
+            span.set(cache='hit', bytes=os.path.getsize(path))
+            return pd.read_parquet(path)
+
+        try:
+            df = loader()
+        except Exception as e:
+            # Serve a stale copy rather than failing when the source is unreachable
+            if os.path.exists(path) and meta.get('version') == CACHE_VERSION and meta.get('key') == key:
+                logger.warning("Failed to refresh %s, using cached copy: %s", name, e)
+                span.set(cache='stale', bytes=os.path.getsize(path))
+                return pd.read_parquet(path)
+            raise
+
+        span.set(cache='miss', rows=len(df))
+        try:
+            tmp_path = cache_path(name, 'parquet.tmp')
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            write_meta(name, key)
+            span.set(bytes=os.path.getsize(path))
+        except Exception as e:
+            logger.warning("Failed to cache %s: %s", name, e)
+
+        return df
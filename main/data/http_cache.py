@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+
+import requests
+
+import data.cache as cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 5 * 60
+MEMORY_ENTRIES = 64
+
+
+class HttpCache:
+    """
+    On-disk cache for JSON GET endpoints
+
+    Each response is stored with the time it was fetched and its ETag/Last-Modified
+    headers. A response younger than the ttl of its endpoint is served from the
+    cache, an older one is revalidated with a conditional request and only
+    downloaded again when the server says it changed.
+
+    Args:
+        directory (str): Where the responses are stored
+        ttl_rules (list): (regex, seconds) pairs matched in order against the url path
+        timeout (float): Request timeout in seconds
+    """
+
+    def __init__(self, directory: str, ttl_rules=(), timeout: float = 30):
+        self.directory = directory
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules]
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._counters = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stale': 0}
+
+    def ttl_for(self, url: str) -> float:
+        path = urlsplit(url).path
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(path):
+                return ttl
+        return DEFAULT_TTL
+
+    def _key(self, url: str, params=None) -> str:
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _read(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        try:
+            with open(self._path(key), 'r') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def _write(self, key: str, entry: dict):
+        self._remember(key, entry)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self._path(key)}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, self._path(key))
+
+    def lookup(self, url: str, params=None, ttl: float = None):
+        """
+        Looks up a cached response
+
+        Args:
+            url (str): The url of the endpoint
+            params (dict): Query parameters
+            ttl (float): Override the ttl of the endpoint
+
+        Returns:
+            tuple: The cache key, the cached entry or None, and whether the entry is fresh
+        """
+        ttl = self.ttl_for(url) if ttl is None else ttl
+        key = self._key(url, params)
+        entry = self._read(key)
+        fresh = entry is not None and time.time() - entry['fetched'] < ttl
+        if fresh:
+            self._count('hits')
+        return key, entry, fresh
+
+    def conditional_headers(self, entry) -> dict:
+        """Gets the headers for revalidating a cached entry."""
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def revalidated(self, key: str, entry: dict):
+        """Marks a cached entry as fresh again after a 304 response and returns its body."""
+        self._count('revalidated')
+        entry = dict(entry, fetched=time.time())
+        self._write(key, entry)
+        return entry['body']
+
+    def store(self, key: str, url: str, body, headers):
+        """Stores a freshly downloaded response and returns its body."""
+        self._count('misses')
+        self._write(key, {
+            'url': url,
+            'fetched': time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'body': body,
+        })
+        return body
+
+    def stale(self, url: str, entry, error: Exception):
+        """Serves a stale entry after a failed request, re-raising the error if nothing is cached."""
+        if entry is None:
+            raise error
+        logger.warning("Failed to fetch %s, serving stale response: %s", url, error)
+        self._count('stale')
+        return entry['body']
+
+    def get_json(self, url: str, params=None, ttl: float = None):
+        """
+        Gets a JSON response through the cache
+
+        Args:
+            url (str): The url of the endpoint
+            params (dict): Query parameters
+            ttl (float): Override the ttl of the endpoint
+
+        Returns:
+            The decoded JSON body
+        """
+        key, entry, fresh = self.lookup(url, params, ttl)
+        if fresh:
+            return entry['body']
+
+        try:
+            response = self.session.get(url, params=params, headers=self.conditional_headers(entry), timeout=self.timeout)
+            if response.status_code == 304 and entry is not None:
+                return self.revalidated(key, entry)
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            return self.stale(url, entry, e)
+
+        return self.store(key, url, body, response.headers)
+
+    def version(self, url: str, params=None):
+        """Gets the ETag or fetch time of the cached response, None if nothing is cached. Never fetches."""
+        entry = self._read(self._key(url, params))
+        if entry is None:
+            return None
+        return entry.get('etag') or entry.get('last_modified') or str(entry['fetched'])
+
+    def stats(self) -> dict:
+        """Gets the hit, miss, revalidation and stale counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+
+def default_directory() -> str:
+    return os.path.join(os.path.abspath(cache.CACHE_DIR), 'http')
@@ -0,0 +1,122 @@
+import glob
+import os
+import threading
+from typing import Optional
+
+import pandas as pd
+
+import data.cache as cache
+import data.nfl as nfl_data
+from data.names import normalize_name
+
+RANKINGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'fantasy_calc_rankings')
+ID_COLUMNS = ['sleeper_id', 'gsis_id', 'fantasycalc_id', 'mfl_id']
+
+
+def _id_str(value) -> Optional[str]:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _load_fantasycalc_ids() -> pd.DataFrame:
+    frames = []
+    for path in sorted(glob.glob(os.path.join(RANKINGS_DIR, '*.csv'))):
+        df = pd.read_csv(path, sep=';', encoding='utf-8-sig', dtype=str,
+                         usecols=['name', 'fantasycalcId', 'sleeperId', 'mflId'])
+        frames.append(df.rename(columns={'fantasycalcId': 'fantasycalc_id', 'sleeperId': 'sleeper_id', 'mflId': 'mfl_id'}))
+    if not frames:
+        return pd.DataFrame(columns=['name', 'fantasycalc_id', 'sleeper_id', 'mfl_id'])
+    return pd.concat(frames).dropna(subset=['sleeper_id']).drop_duplicates('sleeper_id')
+
+
+def build_crosswalk_frame() -> pd.DataFrame:
+    """
+    Builds the id crosswalk table from the nflverse ids and the FantasyCalc rankings
+
+    Returns:
+        pd.DataFrame: String columns name, sleeper_id, gsis_id, fantasycalc_id and mfl_id
+    """
+    ids = nfl_data.get_ids()[['name', 'sleeper_id', 'gsis_id', 'mfl_id']].copy()
+    for column in ['sleeper_id', 'gsis_id', 'mfl_id']:
+        ids[column] = ids[column].map(_id_str)
+
+    fc = _load_fantasycalc_ids()
+    with_sleeper = ids[ids['sleeper_id'].notna()].drop_duplicates('sleeper_id')
+    merged = with_sleeper.merge(fc[['sleeper_id', 'fantasycalc_id']], on='sleeper_id', how='left')
+    # FantasyCalc players that nflverse does not know about yet, e.g. fresh rookies
+    extra = fc[~fc['sleeper_id'].isin(with_sleeper['sleeper_id'])].assign(gsis_id=None)
+
+    df = pd.concat([merged, extra, ids[ids['sleeper_id'].isna()]], ignore_index=True)
+    return df[['name'] + ID_COLUMNS].astype('string')
+
+
+class PlayerIdCrosswalk:
+    """
+    Maps between display name, sleeper_id, gsis_id, fantasycalc_id and mfl_id
+
+    Every lookup is a dict hit. Missing players return None rather than raising.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._rows = [
+            {column: _id_str(value) for column, value in zip(['name'] + ID_COLUMNS, row)}
+            for row in df[['name'] + ID_COLUMNS].itertuples(index=False, name=None)
+        ]
+        self._index = {column: {} for column in ID_COLUMNS}
+        self._index['name'] = {}
+
+        for idx, row in enumerate(self._rows):
+            for column in ID_COLUMNS:
+                if row[column] is not None:
+                    self._index[column].setdefault(row[column], idx)
+            if row['name'] is not None:
+                self._index['name'].setdefault(normalize_name(row['name']), idx)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def lookup(self, value, source: str = 'name') -> Optional[dict]:
+        """
+        Finds the crosswalk record for a player
+
+        Args:
+            value: The name or id of the player
+            source (str): What the value is, 'name' or one of the id columns
+
+        Returns:
+            dict: The record with every known id, or None if the player is unknown
+        """
+        key = normalize_name(value) if source == 'name' else _id_str(value)
+        idx = self._index[source].get(key)
+        return None if idx is None else self._rows[idx]
+
+    def convert(self, value, source: str, target: str) -> Optional[str]:
+        """Converts a name or id from one system to another, None if there is no mapping."""
+        record = self.lookup(value, source)
+        return None if record is None else record[target]
+
+    def sleeper_id(self, player_name: str) -> Optional[int]:
+        """Gets the numeric Sleeper id of a player, None if the player has no Sleeper id."""
+        sleeper_id = self.convert(player_name, 'name', 'sleeper_id')
+        if sleeper_id is None or not sleeper_id.isdigit():
+            return None
+        return int(sleeper_id)
+
+
+_lock = threading.Lock()
+_crosswalk = None
+
+
+def get_crosswalk(refresh: bool = False) -> PlayerIdCrosswalk:
+    """Gets the shared crosswalk, read from the on-disk snapshot when it is fresh."""
+    global _crosswalk
+    with _lock:
+        if refresh or _crosswalk is None:
+            df = cache.read_frame('crosswalk', build_crosswalk_frame, key='crosswalk',
+                                  ttl=nfl_data.IDS_TTL, refresh=refresh)
+            _crosswalk = PlayerIdCrosswalk(df)
+        return _crosswalk
@@ -0,0 +1,146 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import data.players as players
+import data.projections as projections
+
+# Player positions each Sleeper roster slot accepts
+SLOT_ELIGIBILITY = {
+    'QB': {'QB'},
+    'RB': {'RB'},
+    'WR': {'WR'},
+    'TE': {'TE'},
+    'K': {'K'},
+    'DEF': {'DEF'},
+    'FLEX': {'RB', 'WR', 'TE'},
+    'WRRB_FLEX': {'RB', 'WR'},
+    'REC_FLEX': {'WR', 'TE'},
+    'SUPER_FLEX': {'QB', 'RB', 'WR', 'TE'},
+    'DL': {'DL', 'DE', 'DT'},
+    'LB': {'LB'},
+    'DB': {'DB', 'CB', 'S'},
+    'IDP_FLEX': {'DL', 'DE', 'DT', 'LB', 'DB', 'CB', 'S'},
+}
+BENCH_SLOTS = {'BN', 'IR', 'TAXI'}
+
+
+class LineupSolver:
+    """
+    Optimal starting lineups for the roster_positions of a league
+
+    A player scores the same points in any slot they fill, so the sets of players
+    that fit in the starting slots form a matroid: adding players best first and
+    keeping each one whenever an augmenting path finds room for them gives the
+    exact best lineup. A roster of 20 players takes a few hundred steps instead of
+    the millions of assignments brute force would try.
+
+    Args:
+        roster_positions (list): The league's roster_positions, bench slots are ignored and unknown slots stay empty
+    """
+
+    def __init__(self, roster_positions: Iterable[str]):
+        self.slots = [slot for slot in roster_positions if slot not in BENCH_SLOTS]
+        self._slots_by_position = {}
+        for position in set().union(*SLOT_ELIGIBILITY.values()):
+            eligible = [idx for idx, slot in enumerate(self.slots) if position in SLOT_ELIGIBILITY.get(slot, ())]
+            # Most restrictive slots first, so flex slots are kept for whoever needs them
+            self._slots_by_position[position] = sorted(eligible, key=lambda idx: len(SLOT_ELIGIBILITY[self.slots[idx]]))
+        self._accepts = [SLOT_ELIGIBILITY.get(slot, set()) for slot in self.slots]
+        self._swappable = [
+            (first, second) for first in range(len(self.slots)) for second in range(len(self.slots))
+            if len(self._accepts[first]) < len(self._accepts[second]) and self._accepts[first] & self._accepts[second]
+        ]
+
+    def _place(self, player: int, positions: List[str], filled: List[int], seen: set) -> bool:
+        for slot in self._slots_by_position.get(positions[player], ()):
+            if slot in seen:
+                continue
+            seen.add(slot)
+            if filled[slot] < 0 or self._place(filled[slot], positions, filled, seen):
+                filled[slot] = player
+                return True
+        return False
+
+    def solve(self, player_ids: List[str], points: np.ndarray, positions: List[str]) -> dict:
+        """
+        Gets the lineup with the most projected points
+
+        Args:
+            player_ids (list): The players that can start
+            points (np.ndarray): Projected points of each player
+            positions (list): Position of each player
+
+        Returns:
+            dict: "starters" as (slot, player id or None, points) tuples in roster order, "bench" player ids and total "points"
+        """
+        filled = [-1] * len(self.slots)
+        empty = len(self.slots)
+        for player in np.argsort(-np.asarray(points), kind='stable').tolist():
+            if not empty:
+                break
+            if self._place(player, positions, filled, set()):
+                empty -= 1
+
+        # Augmenting paths can push a better player into a flex slot, swap them back for a lineup that reads naturally
+        for first, second in self._swappable:
+            a, b = filled[first], filled[second]
+            if a >= 0 and b >= 0 and points[b] > points[a] and positions[a] in self._accepts[second] \
+                    and positions[b] in self._accepts[first]:
+                filled[first], filled[second] = b, a
+
+        starters = [
+            (slot, player_ids[player] if player >= 0 else None, float(points[player]) if player >= 0 else 0.0)
+            for slot, player in zip(self.slots, filled)
+        ]
+        started = set(filled)
+        return {
+            'starters': starters,
+            'bench': [player_id for idx, player_id in enumerate(player_ids) if idx not in started],
+            'points': sum(slot_points for _, _, slot_points in starters),
+        }
+
+
+def optimal_lineups(rosters: List[dict], roster_positions: Iterable[str], weeks: Iterable[int],
+                    scoring_format: str = 'ppr', season=None, registry=None) -> Dict[int, dict]:
+    """
+    Gets the best lineup of several rosters at once
+
+    Projections of every rostered player come from one lookup in the projection
+    matrix, players on injured reserve or the taxi squad cannot start.
+
+    Args:
+        rosters (list): Sleeper rosters
+        roster_positions (list): The league's roster_positions
+        weeks (list): The weeks projected points are summed over, usually one
+        scoring_format (str): "ppr", "half_ppr" or "std"
+        season: The season year, defaults to the season in globals
+        registry (PlayerRegistry): Positions of the players, defaults to the shared registry
+
+    Returns:
+        dict: The lineup of each roster id, as returned by LineupSolver.solve
+    """
+    solver = LineupSolver(roster_positions)
+    registry = registry or players.get_registry()
+    matrix = projections.get_projection_matrix(season)
+
+    eligible = {}
+    for roster in rosters:
+        benched = set(roster.get('reserve') or []) | set(roster.get('taxi') or [])
+        eligible[roster['roster_id']] = [str(player_id) for player_id in roster.get('players') or [] if player_id not in benched]
+    player_ids = [player_id for roster_players in eligible.values() for player_id in roster_players]
+    points = matrix.totals(list(weeks), scoring_format, player_ids)
+    positions = [getattr(registry.get(player_id), 'position', None) for player_id in player_ids]
+
+    lineups, offset = {}, 0
+    for roster_id, roster_players in eligible.items():
+        end = offset + len(roster_players)
+        lineups[roster_id] = solver.solve(roster_players, points[offset:end], positions[offset:end])
+        offset = end
+    return lineups
+
+
+def optimal_lineup(roster: dict, roster_positions: Iterable[str], weeks: Iterable[int], scoring_format: str = 'ppr',
+                   season=None, registry=None) -> Optional[dict]:
+    """Gets the best lineup of one roster, see optimal_lineups."""
+    return optimal_lineups([roster], roster_positions, weeks, scoring_format, season, registry).get(roster['roster_id'])
@@ -0,0 +1,164 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from rapidfuzz import fuzz, process
+
+import data.nfl as nfl_data
+
+_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+NGRAM_SIZE = 3
+MAX_CANDIDATES = 25
+MAX_NAME_TOKENS = 4
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a player name for matching
+
+    Lowercases, strips accents and punctuation and drops generational suffixes,
+    so "D’Andre Swift" and "Kenneth Walker III" match "dandre swift" and "kenneth walker".
+
+    Args:
+        name (str): The name of the player
+
+    Returns:
+        str: The normalized name
+    """
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    name = re.sub(r'[^a-z0-9 ]', '', name.lower().replace('-', ' '))
+    return ' '.join(token for token in name.split() if token not in _SUFFIXES)
+
+
+def _ngrams(text: str) -> set:
+    padded = f' {text} '
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+class PlayerNameResolver:
+    """
+    Resolves free-form player names to canonical display names
+
+    The index is built once: an exact hash on the normalized name, blocking on
+    last name and first initial, and an n-gram posting list. Fuzzy scoring only
+    runs on the resulting shortlist.
+    """
+
+    def __init__(self, names: Iterable[str], min_score: float = 50, cache_size: int = 4096):
+        self.names = list(dict.fromkeys(name for name in names if isinstance(name, str) and name))
+        self.min_score = min_score
+        self._normalized = [normalize_name(name) for name in self.names]
+        self._exact = {}
+        self._tokens = defaultdict(set)
+        self._initial_last = defaultdict(set)
+        self._grams = defaultdict(set)
+
+        for idx, normalized in enumerate(self._normalized):
+            self._exact.setdefault(normalized, idx)
+            tokens = normalized.split()
+            for token in tokens:
+                self._tokens[token].add(idx)
+            if len(tokens) > 1:
+                self._initial_last[(tokens[0][0], tokens[-1])].add(idx)
+            for gram in _ngrams(normalized):
+                self._grams[gram].add(idx)
+
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _candidates(self, normalized: str) -> List[int]:
+        tokens = normalized.split()
+        candidates = set()
+        if len(tokens) > 1:
+            candidates |= self._initial_last.get((tokens[0][0], tokens[-1]), set())
+        for token in tokens:
+            candidates |= self._tokens.get(token, set())
+
+        gram_counts = Counter()
+        for gram in _ngrams(normalized):
+            gram_counts.update(self._grams.get(gram, ()))
+        candidates.update(idx for idx, _ in gram_counts.most_common(MAX_CANDIDATES))
+        return list(candidates)
+
+    def _resolve(self, player_name: str) -> str:
+        normalized = normalize_name(player_name)
+        if normalized in self._exact:
+            return self.names[self._exact[normalized]]
+
+        shortlist = {idx: self._normalized[idx] for idx in self._candidates(normalized)}
+        match = process.extractOne(normalized, shortlist, scorer=fuzz.token_set_ratio,
+                                   processor=None, score_cutoff=self.min_score + 1e-9)
+        if match is None:
+            return player_name
+        return self.names[match[2]]
+
+    def resolve(self, player_name: str) -> str:
+        """
+        Resolves a player name to the closest known display name
+
+        Args:
+            player_name (str): The name of the player
+
+        Returns:
+            str: The matched display name, or the input if nothing scores above min_score
+        """
+        return self._resolve_cached(player_name)
+
+    def resolve_many(self, player_names: Iterable[str]) -> List[str]:
+        """
+        Resolves a batch of player names
+
+        Args:
+            player_names (list): The names of the players
+
+        Returns:
+            list: The matched display names, in the same order
+        """
+        return [self.resolve(player_name) for player_name in player_names]
+
+    def extract(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Finds the player names mentioned in a piece of text
+
+        Only exact matches of a normalized name count, the longest match wins.
+
+        Args:
+            text (str): Free text, e.g. a question
+
+        Returns:
+            list: (display name, start, end) tuples, start and end index the tokens of normalize_name(text)
+        """
+        tokens = normalize_name(text).split()
+        found = []
+        start = 0
+        while start < len(tokens):
+            for end in range(min(len(tokens), start + MAX_NAME_TOKENS), start + 1, -1):
+                idx = self._exact.get(' '.join(tokens[start:end]))
+                if idx is not None:
+                    found.append((self.names[idx], start, end))
+                    start = end
+                    break
+            else:
+                start += 1
+        return found
+
+    def cache_info(self):
+        return self._resolve_cached.cache_info()
+
+
+_lock = threading.Lock()
+_resolver = None
+_resolver_source = None
+
+
+def get_resolver() -> PlayerNameResolver:
+    """Gets the shared resolver, rebuilding it when the weekly stats are reloaded."""
+    global _resolver, _resolver_source
+    stats = nfl_data.get_weekly_data()
+    with _lock:
+        if _resolver is None or _resolver_source is not stats:
+            _resolver = PlayerNameResolver(stats["player_display_name"].unique())
+            _resolver_source = stats
+        return _resolver
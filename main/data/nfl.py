@@ -0,0 +1,90 @@
+import threading
+
+import data.cache as cache
+
+SEASON = 2024
+WEEKLY_TTL = 12 * 60 * 60
+IDS_TTL = 7 * 24 * 60 * 60
+SCHEDULE_TTL = 12 * 60 * 60
+
+_lock = threading.Lock()
+_frames = {}
+# Bumped every time a frame is (re)loaded, see version()
+_generation = 0
+
+
+def _load(name, loader, key, ttl, refresh=False):
+    global _generation
+    with _lock:
+        if refresh or name not in _frames:
+            _frames[name] = cache.read_frame(name, loader, key=key, ttl=ttl, refresh=refresh)
+            _generation += 1
+        return _frames[name]
+
+
+def version() -> int:
+    """Gets a counter that changes whenever one of the in-memory frames is loaded or refreshed."""
+    return _generation
+
+
+def get_weekly_data(season: int = SEASON, refresh: bool = False):
+    """
+    Gets the weekly player stats for a season, loaded once per process and cached on disk
+
+    Args:
+        season (int): The season year
+        refresh (bool): Download the data again instead of using the cache
+
+    Returns:
+        pd.DataFrame: One row per player per week
+    """
+    import nfl_data_py as nfl  # imported on first download, it is slow to import
+
+    return _load(f'weekly_{season}', lambda: nfl.import_weekly_data([season]),
+                 key=f'weekly:{season}', ttl=WEEKLY_TTL, refresh=refresh)
+
+
+def get_ids(refresh: bool = False):
+    """
+    Gets the nflverse player id table, loaded once per process and cached on disk
+
+    Args:
+        refresh (bool): Download the data again instead of using the cache
+
+    Returns:
+        pd.DataFrame: One row per player with ids for each fantasy platform
+    """
+    import nfl_data_py as nfl  # imported on first download, it is slow to import
+
+    return _load('ids', nfl.import_ids, key='ids', ttl=IDS_TTL, refresh=refresh)
+
+
+def get_schedules(season: int = SEASON, refresh: bool = False):
+    """
+    Gets the NFL schedule of a season, loaded once per process and cached on disk
+
+    Args:
+        season (int): The season year
+        refresh (bool): Download the data again instead of using the cache
+
+    Returns:
+        pd.DataFrame: One row per game with week, game_type, home_team and away_team
+    """
+    import nfl_data_py as nfl  # imported on first download, it is slow to import
+
+    return _load(f'schedules_{season}', lambda: nfl.import_schedules([season]),
+                 key=f'schedules:{season}', ttl=SCHEDULE_TTL, refresh=refresh)
+
+
+def refresh():
+    """Drop the in-memory copies and download every loaded dataset again."""
+    with _lock:
+        names = list(_frames)
+        _frames.clear()
+    for name in names:
+        if name == 'ids':
+            get_ids(refresh=True)
+        elif name.startswith('weekly_'):
+            get_weekly_data(int(name.split('_')[1]), refresh=True)
+        elif name.startswith('schedules_'):
+            get_schedules(int(name.split('_')[1]), refresh=True)
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+import data.cache as cache
+import data.sleeper_api as sleeper_api
+from data.names import normalize_name
+
+PLAYERS_TTL = 24 * 60 * 60
+COLUMNS = ['player_id', 'full_name', 'team', 'position', 'status']
+
+
+class PlayerRecord:
+    __slots__ = COLUMNS
+
+    def __init__(self, player_id, full_name, team, position, status):
+        self.player_id = player_id
+        self.full_name = full_name
+        self.team = team
+        self.position = position
+        self.status = status
+
+    def __repr__(self):
+        return f"PlayerRecord({self.player_id!r}, {self.full_name!r}, {self.team!r}, {self.position!r})"
+
+
+def _player_frame(all_players: dict) -> pd.DataFrame:
+    rows = []
+    for player_id, player in all_players.items():
+        full_name = player.get('full_name')
+        if not full_name:
+            # Team defenses only have first_name/last_name, e.g. "San Francisco" "49ers"
+            full_name = ' '.join(part for part in (player.get('first_name'), player.get('last_name')) if part) or None
+        rows.append((player_id, full_name, player.get('team'), player.get('position'), player.get('status')))
+    return pd.DataFrame(rows, columns=COLUMNS).astype('string')
+
+
+def load_player_frame() -> pd.DataFrame:
+    """Downloads the Sleeper player dump and keeps only the columns the registry needs."""
+    # The raw dump is several megabytes, so it skips the response cache and only the compact frame is stored
+    return _player_frame(sleeper_api.get_all_players(cache=False))
+
+
+class PlayerRegistry:
+    """
+    Compact Sleeper player records indexed by id and by name
+
+    Args:
+        df (pd.DataFrame): Columns player_id, full_name, team, position and status
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._by_id = {}
+        self._by_name = {}
+        for row in df[COLUMNS].itertuples(index=False, name=None):
+            record = PlayerRecord(*(None if pd.isna(value) else value for value in row))
+            self._by_id[record.player_id] = record
+            if record.full_name:
+                key = normalize_name(record.full_name)
+                current = self._by_name.get(key)
+                # Prefer players on an NFL team when names collide
+                if current is None or (current.team is None and record.team is not None):
+                    self._by_name[key] = record
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, player_id):
+        return str(player_id) in self._by_id
+
+    def get(self, player_id) -> Optional[PlayerRecord]:
+        return self._by_id.get(str(player_id))
+
+    def name(self, player_id, default=None) -> Optional[str]:
+        """Gets the full name of a player, default if the id is unknown."""
+        record = self._by_id.get(str(player_id))
+        return record.full_name if record is not None and record.full_name else default
+
+    def find(self, full_name: str) -> Optional[PlayerRecord]:
+        """Finds a player by full name, ignoring case, punctuation and suffixes."""
+        return self._by_name.get(normalize_name(full_name))
+
+
+_lock = threading.Lock()
+_registry = None
+_loaded_at = 0.0
+
+
+def get_registry(refresh: bool = False) -> PlayerRegistry:
+    """Gets the shared registry, read from the daily on-disk snapshot and reloaded once it is a day old."""
+    global _registry, _loaded_at
+    with _lock:
+        if refresh or _registry is None or time.time() - _loaded_at > PLAYERS_TTL:
+            df = cache.read_frame('players', load_player_frame, key='players', ttl=PLAYERS_TTL, refresh=refresh)
+            _registry = PlayerRegistry(df)
+            _loaded_at = time.time()
+        return _registry
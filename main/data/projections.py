@@ -0,0 +1,159 @@
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import data.sleeper_api as sleeper_api
+import globals
+
+FORMATS = ['ppr', 'half_ppr', 'std']
+FORMAT_ALIASES = {'standard': 'std', 'half': 'half_ppr'}
+# Weeks of the fantasy season, week 18 is not played in most leagues
+SEASON_WEEKS = 17
+PLAYOFF_WEEKS = (15, 16, 17)
+# How often the cached weekly payloads are checked for changes
+REFRESH_INTERVAL = 60
+
+
+def format_index(scoring_format: str) -> int:
+    return FORMATS.index(FORMAT_ALIASES.get(scoring_format, scoring_format))
+
+
+class ProjectionMatrix:
+    """
+    Sleeper weekly projections of every player as one players x weeks x formats array
+
+    Each week is copied in once from its payload and only copied again when Sleeper
+    updates it, so totals, windows and rankings over all players are single NumPy
+    reductions instead of a pass over the payload of every week for every player.
+
+    Args:
+        season: The season year
+        season_type (str): "regular" or "post"
+        weeks (int): Number of weeks in the season
+    """
+
+    def __init__(self, season, season_type: str = "regular", weeks: int = SEASON_WEEKS):
+        self.season = season
+        self.season_type = season_type
+        self.weeks = weeks
+        self.player_ids = []
+        self.index = {}
+        self.values = np.zeros((0, weeks + 1, len(FORMATS)), dtype=np.float32)
+        # Version of the payload each week was copied from
+        self.week_versions = {}
+        self.checked = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _row(self, player_id: str) -> int:
+        idx = self.index.get(player_id)
+        if idx is None:
+            idx = len(self.player_ids)
+            self.player_ids.append(player_id)
+            self.index[player_id] = idx
+            if idx == len(self.values):
+                # Grow by doubling so adding players stays amortized O(1)
+                grown = np.zeros((max(256, 2 * len(self.values)),) + self.values.shape[1:], dtype=np.float32)
+                grown[:len(self.values)] = self.values
+                self.values = grown
+        return idx
+
+    def update_week(self, week: int, payload: dict):
+        """Replaces the projections of one week with a Sleeper projections payload."""
+        payload = payload or {}
+        points = np.array(
+            [[projection.get(f'pts_{scoring_format}') or 0 for scoring_format in FORMATS] for projection in payload.values()],
+            dtype=np.float32,
+        ).reshape(-1, len(FORMATS))
+        with self._lock:
+            rows = [self._row(str(player_id)) for player_id in payload]
+            self.values[:, week, :] = 0
+            self.values[rows, week, :] = points
+
+    def refresh(self, force: bool = False) -> List[int]:
+        """
+        Copies in the weeks whose payload changed since they were last copied
+
+        Returns:
+            list: The weeks that were updated
+        """
+        with self._refresh_lock:
+            if not force and time.time() - self.checked < REFRESH_INTERVAL:
+                return []
+            weeks = range(1, self.weeks + 1)
+            payloads = sleeper_api.get_week_projections_many(self.season_type, self.season, weeks)
+            updated = []
+            for week in weeks:
+                version = sleeper_api.projections_version(self.season_type, self.season, week)
+                if force or version is None or version != self.week_versions.get(week):
+                    self.update_week(week, payloads[week])
+                    self.week_versions[week] = version
+                    updated.append(week)
+            self.checked = time.time()
+            return updated
+
+    def _rows(self, player_ids: Optional[Iterable]) -> np.ndarray:
+        if player_ids is None:
+            return np.arange(len(self.player_ids))
+        return np.array([self.index.get(str(player_id), -1) for player_id in player_ids], dtype=int)
+
+    def totals(self, weeks: Iterable[int], scoring_format: str = 'ppr', player_ids: Optional[Iterable] = None) -> np.ndarray:
+        """
+        Gets the projected points of players summed over some weeks
+
+        Args:
+            weeks (list): The week numbers
+            scoring_format (str): "ppr", "half_ppr" or "std"
+            player_ids (list): Sleeper ids, defaults to every player in player_ids order
+
+        Returns:
+            np.ndarray: One total per player, 0 for unknown players
+        """
+        weeks = [week for week in weeks if 1 <= week <= self.weeks]
+        rows = self._rows(player_ids)
+        with self._lock:
+            totals = self.values[:len(self.player_ids), weeks, format_index(scoring_format)].sum(axis=1, dtype=np.float64)
+        if not len(totals):
+            return np.zeros(len(rows))
+        return np.where(rows >= 0, totals[np.maximum(rows, 0)], 0)
+
+    def rest_of_season(self, start_week: int, end_week: int = 17, scoring_format: str = 'ppr', player_ids=None) -> np.ndarray:
+        return self.totals(range(start_week, end_week + 1), scoring_format, player_ids)
+
+    def playoffs(self, scoring_format: str = 'ppr', player_ids=None, weeks=PLAYOFF_WEEKS) -> np.ndarray:
+        return self.totals(weeks, scoring_format, player_ids)
+
+    def rank(self, weeks: Iterable[int], scoring_format: str = 'ppr', player_ids=None, top_n: int = None) -> List[Tuple[str, float]]:
+        """
+        Ranks players by their projected points over some weeks
+
+        Returns:
+            list: (Sleeper id, total) pairs, best first, only the top_n when given
+        """
+        ids = list(self.player_ids) if player_ids is None else [str(player_id) for player_id in player_ids]
+        totals = self.totals(weeks, scoring_format, ids)
+        if top_n is not None and top_n < len(totals):
+            # Only the top_n need sorting
+            order = np.argpartition(-totals, top_n)[:top_n]
+            order = order[np.argsort(-totals[order])]
+        else:
+            order = np.argsort(-totals)
+        return [(ids[idx], float(totals[idx])) for idx in order]
+
+
+_lock = threading.Lock()
+_matrices = {}
+
+
+def get_projection_matrix(season=None, season_type: str = "regular", refresh: bool = False) -> ProjectionMatrix:
+    """Gets the shared matrix of a season, refreshing the weeks Sleeper updated at most once a minute."""
+    season = season or globals.get_season()
+    with _lock:
+        matrix = _matrices.get((season, season_type))
+        if matrix is None:
+            matrix = ProjectionMatrix(season, season_type)
+            _matrices[(season, season_type)] = matrix
+    matrix.refresh(force=refresh)
+    return matrix
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads and coroutines
+
+    Args:
+        rate (float): Requests allowed per second
+        burst (int): Requests allowed at once before throttling starts
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a request is allowed."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request is allowed."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,95 @@
+import threading
+from typing import Dict, List
+
+import pandas as pd
+
+import data.nfl as nfl_data
+
+POSITIONS = ['QB', 'RB', 'WR', 'TE']
+FORMAT_COLUMNS = {'ppr': 'fantasy_points_ppr', 'std': 'fantasy_points'}
+
+
+class ScheduleStrength:
+    """
+    Fantasy points each defense allows to each position, joined to the remaining schedule
+
+    The table is computed in one groupby over the regular season weekly stats: the
+    points scored against a defense by a position divided by the games it played.
+    Rank 1 is the defense that allows the most points, the easiest matchup.
+
+    Args:
+        weekly (pd.DataFrame): The weekly player stats
+        schedules (pd.DataFrame): The NFL schedule of the season
+    """
+
+    def __init__(self, weekly: pd.DataFrame, schedules: pd.DataFrame):
+        if 'season_type' in weekly:
+            weekly = weekly[weekly['season_type'] == 'REG']
+        weekly = weekly[weekly['position'].isin(POSITIONS)]
+
+        allowed = weekly.groupby(['opponent_team', 'position'], observed=True).agg(
+            ppr=(FORMAT_COLUMNS['ppr'], 'sum'), std=(FORMAT_COLUMNS['std'], 'sum'), games=('week', 'nunique'),
+        )
+        allowed['ppr'] /= allowed['games']
+        allowed['std'] /= allowed['games']
+        allowed['half_ppr'] = (allowed['ppr'] + allowed['std']) / 2
+        for scoring_format in ['ppr', 'half_ppr', 'std']:
+            by_position = allowed.groupby(level='position')[scoring_format]
+            allowed[f'{scoring_format}_rank'] = by_position.rank(ascending=False, method='min').astype(int)
+            # Above 1 means the defense allows more than the average defense
+            allowed[f'{scoring_format}_ratio'] = allowed[scoring_format] / by_position.transform('mean')
+        self.allowed = allowed
+        self.teams = allowed.index.get_level_values('opponent_team').nunique()
+
+        games = schedules[schedules['game_type'] == 'REG'] if 'game_type' in schedules else schedules
+        # Each game seen from both sides, so a team's opponents are one lookup
+        self.opponents = pd.concat([
+            games[['week', 'home_team', 'away_team']].set_axis(['week', 'team', 'opponent'], axis=1).assign(home=True),
+            games[['week', 'away_team', 'home_team']].set_axis(['week', 'team', 'opponent'], axis=1).assign(home=False),
+        ]).sort_values(['team', 'week']).set_index('team')
+
+    def remaining(self, team: str, position: str, start_week: int, end_week: int = 17,
+                  scoring_format: str = 'ppr') -> List[Dict]:
+        """
+        Gets the difficulty of the remaining games of a team for one position
+
+        Args:
+            team (str): The team abbreviation
+            position (str): QB, RB, WR or TE
+            start_week (int): The first week
+            end_week (int): The last week
+            scoring_format (str): "ppr", "half_ppr" or "std"
+
+        Returns:
+            list: One dict per game with week, opponent, home, allowed points per game, rank and ratio
+        """
+        if team not in self.opponents.index:
+            return []
+        games = self.opponents.loc[[team]]
+        games = games[(games['week'] >= start_week) & (games['week'] <= end_week)]
+        keys = pd.MultiIndex.from_arrays([games['opponent'], [position] * len(games)])
+        matchups = self.allowed.reindex(keys)[[scoring_format, f'{scoring_format}_rank', f'{scoring_format}_ratio']]
+        return [
+            {'week': int(week), 'opponent': opponent, 'home': bool(home), 'allowed': allowed, 'rank': rank, 'ratio': ratio}
+            for week, opponent, home, (allowed, rank, ratio) in zip(
+                games['week'], games['opponent'], games['home'], matchups.itertuples(index=False, name=None)
+            )
+        ]
+
+
+_lock = threading.Lock()
+_strength = None
+_strength_version = None
+
+
+def get_schedule_strength(season: int = nfl_data.SEASON) -> ScheduleStrength:
+    """Gets the shared strength of schedule table, computed again when the nflverse data is reloaded."""
+    global _strength, _strength_version
+    weekly = nfl_data.get_weekly_data(season)
+    schedules = nfl_data.get_schedules(season)
+    with _lock:
+        version = (season, nfl_data.version())
+        if _strength is None or _strength_version != version:
+            _strength = ScheduleStrength(weekly, schedules)
+            _strength_version = version
+        return _strength
@@ -0,0 +1,198 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import data.lineups as lineups
+import data.players as players
+import data.projections as projections
+import data.stats as stats_engine
+
+logger = logging.getLogger(__name__)
+
+SIMULATIONS = 100_000
+# Seasons simulated per batch, bounds the memory of the score arrays
+CHUNK_SIZE = 10_000
+DEFAULT_PLAYOFF_TEAMS = 6
+DEFAULT_PLAYOFF_WEEK_START = 15
+# Deviation of a player without enough games in the weekly stats, as a fraction of their projection
+DEFAULT_VARIATION = 0.5
+# Weekly stats column the deviations are measured on, half PPR uses the PPR spread
+DEVIATION_COLUMNS = {'ppr': 'fantasy_points_ppr', 'half_ppr': 'fantasy_points_ppr', 'std': 'fantasy_points'}
+
+
+class SeasonModel:
+    """
+    The rest of a league's season as arrays, ready to be simulated
+
+    Args:
+        team_ids (list): The roster ids
+        wins (np.ndarray): Current wins of each team, ties counted as half
+        points_for (np.ndarray): Current points for of each team
+        schedule (list): One array of (team index, team index) pairs per remaining regular season week
+        means (np.ndarray): Projected score of each team, teams x (regular season weeks + playoff rounds)
+        deviations (np.ndarray): Deviation of each score, same shape as means
+        playoff_teams (int): Number of teams that make the playoffs
+    """
+
+    def __init__(self, team_ids: List, wins: np.ndarray, points_for: np.ndarray, schedule: List[np.ndarray],
+                 means: np.ndarray, deviations: np.ndarray, playoff_teams: int = DEFAULT_PLAYOFF_TEAMS):
+        self.team_ids = list(team_ids)
+        self.wins = np.asarray(wins, dtype=np.float32)
+        self.points_for = np.asarray(points_for, dtype=np.float32)
+        self.schedule = schedule
+        self.means = np.asarray(means, dtype=np.float32)
+        self.deviations = np.asarray(deviations, dtype=np.float32)
+        self.playoff_teams = max(1, min(playoff_teams, len(self.team_ids)))
+        self.rounds = int(np.ceil(np.log2(self.playoff_teams)))
+
+    def simulate(self, simulations: int = SIMULATIONS, seed: Optional[int] = None, workers: int = 1) -> Dict:
+        """
+        Simulates the rest of the season many times
+
+        Seasons are split in chunks with their own random streams spawned from the
+        seed, so the same seed gives the same result with any number of workers.
+
+        Args:
+            simulations (int): Number of seasons
+            seed (int): Seed of the random streams, None for a different result every time
+            workers (int): Processes to spread the chunks over, 1 runs them in this process
+
+        Returns:
+            dict: Per roster id, the probability to make the "playoffs", of each "seeds" position and to be "champion", and the mean "wins"
+        """
+        sizes = [CHUNK_SIZE] * (simulations // CHUNK_SIZE) + ([simulations % CHUNK_SIZE] if simulations % CHUNK_SIZE else [])
+        streams = np.random.SeedSequence(seed).spawn(len(sizes))
+        if workers > 1 and len(sizes) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                counts = list(pool.map(_simulate_chunk, repeat(self), sizes, streams))
+        else:
+            counts = [_simulate_chunk(self, size, stream) for size, stream in zip(sizes, streams)]
+
+        seeds = sum(count[0] for count in counts) / simulations
+        champions = sum(count[1] for count in counts) / simulations
+        wins = sum(count[2] for count in counts) / simulations
+        return {
+            team_id: {
+                'playoffs': float(seeds[idx, :self.playoff_teams].sum()),
+                'seeds': seeds[idx, :self.playoff_teams].tolist(),
+                'champion': float(champions[idx]),
+                'wins': float(wins[idx]),
+            }
+            for idx, team_id in enumerate(self.team_ids)
+        }
+
+
+def _simulate_chunk(model: SeasonModel, simulations: int, stream) -> tuple:
+    """Simulates a chunk of seasons, returns the counts of every seed and title and the total wins of each team."""
+    rng = np.random.default_rng(stream)
+    teams = len(model.team_ids)
+    regular_weeks = len(model.schedule)
+
+    scores = rng.standard_normal((simulations,) + model.means.shape, dtype=np.float32)
+    scores *= model.deviations
+    scores += model.means
+    np.maximum(scores, 0, out=scores)
+
+    wins = np.tile(model.wins, (simulations, 1))
+    points_for = model.points_for + scores[:, :, :regular_weeks].sum(axis=2)
+    for week, pairs in enumerate(model.schedule):
+        first, second = pairs[:, 0], pairs[:, 1]
+        first_scores, second_scores = scores[:, first, week], scores[:, second, week]
+        wins[:, first] += first_scores > second_scores
+        wins[:, second] += second_scores > first_scores
+
+    # Teams of every season by seed, wins first and points for as the tiebreaker
+    order = np.lexsort((points_for, wins), axis=1)[:, ::-1]
+    seed_counts = np.zeros((teams, teams))
+    for seed in range(teams):
+        seed_counts[:, seed] = np.bincount(order[:, seed], minlength=teams)
+
+    # Bracket of seed numbers, the top seeds get the byes and the field is reseeded every round
+    field = np.tile(np.arange(model.playoff_teams), (simulations, 1))
+    byes = 2 ** model.rounds - model.playoff_teams
+    for playoff_round in range(model.rounds):
+        column = min(regular_weeks + playoff_round, model.means.shape[1] - 1)
+        seeded = np.take_along_axis(order, field, axis=1)
+        round_scores = np.take_along_axis(scores[:, :, column], seeded, axis=1)
+        rested = byes if playoff_round == 0 else 0
+        playing = field.shape[1] - rested
+        high = np.arange(rested, rested + playing // 2)
+        low = high[::-1] + playing // 2
+        high_wins = round_scores[:, high] >= round_scores[:, low]
+        winners = np.where(high_wins, field[:, high], field[:, low])
+        field = np.sort(np.concatenate([field[:, :rested], winners], axis=1), axis=1)
+    champions = np.take_along_axis(order, field[:, :1], axis=1)[:, 0]
+
+    return seed_counts, np.bincount(champions, minlength=teams).astype(float), wins.sum(axis=0, dtype=np.float64)
+
+
+def build_season_model(snapshot, week: int, scoring_format: str = 'ppr', season=None, registry=None) -> SeasonModel:
+    """
+    Builds the model of the rest of a league's season
+
+    Each team's weekly mean is the projected score of its best lineup, and its
+    deviation combines the spread of every starter's weekly fantasy points in the
+    nflverse stats, as if the starters scored independently.
+
+    Args:
+        snapshot: LeagueSnapshot of the league
+        week (int): The first week left to play
+        scoring_format (str): "ppr", "half_ppr" or "std"
+        season: The season year, defaults to the season in globals
+        registry (PlayerRegistry): Names and positions of the players, defaults to the shared registry
+
+    Returns:
+        SeasonModel: The remaining regular season weeks followed by the playoff rounds
+    """
+    registry = registry or players.get_registry()
+    settings = snapshot.settings.get('settings') or {}
+    playoff_week_start = settings.get('playoff_week_start') or DEFAULT_PLAYOFF_WEEK_START
+    playoff_teams = settings.get('playoff_teams') or DEFAULT_PLAYOFF_TEAMS
+    roster_positions = snapshot.settings.get('roster_positions') or []
+
+    team_ids = [roster['roster_id'] for roster in snapshot.rosters]
+    team_index = {team_id: idx for idx, team_id in enumerate(team_ids)}
+    records = [roster.get('settings') or {} for roster in snapshot.rosters]
+    wins = np.array([record.get('wins', 0) + record.get('ties', 0) / 2 for record in records])
+    points_for = np.array([record.get('fpts', 0) + record.get('fpts_decimal', 0) / 100 for record in records])
+
+    rostered = [player_id for roster in snapshot.rosters for player_id in roster.get('players') or []]
+    stat_column = DEVIATION_COLUMNS[projections.FORMATS[projections.format_index(scoring_format)]]
+    player_deviations = stats_engine.get_stats_engine().deviations(
+        [registry.name(player_id, player_id) for player_id in rostered], stat_column
+    )
+    player_deviations = dict(zip(rostered, player_deviations))
+
+    schedule, weeks = [], []
+    for regular_week in range(week, playoff_week_start):
+        by_matchup = {}
+        for matchup in snapshot.get_matchups(regular_week):
+            if matchup.get('matchup_id') is not None and matchup.get('roster_id') in team_index:
+                by_matchup.setdefault(matchup['matchup_id'], []).append(team_index[matchup['roster_id']])
+        pairs = [pair for pair in by_matchup.values() if len(pair) == 2]
+        if not pairs:
+            logger.warning("No matchups found for week %s, it is left out of the simulation", regular_week)
+            continue
+        schedule.append(np.array(pairs, dtype=int))
+        weeks.append(regular_week)
+    playoff_rounds = int(np.ceil(np.log2(max(1, min(playoff_teams, len(team_ids))))))
+    weeks += [min(playoff_week_start + playoff_round, projections.SEASON_WEEKS) for playoff_round in range(max(playoff_rounds, 1))]
+
+    means = np.zeros((len(team_ids), len(weeks)))
+    deviations = np.zeros((len(team_ids), len(weeks)))
+    for column, scored_week in enumerate(weeks):
+        best = lineups.optimal_lineups(snapshot.rosters, roster_positions, [scored_week], scoring_format, season, registry)
+        for team_id, lineup in best.items():
+            variance = 0.0
+            for _, player_id, points in lineup['starters']:
+                if player_id is None:
+                    continue
+                deviation = player_deviations.get(player_id, np.nan)
+                variance += (DEFAULT_VARIATION * points if np.isnan(deviation) else deviation) ** 2
+            means[team_index[team_id], column] = lineup['points']
+            deviations[team_index[team_id], column] = np.sqrt(variance)
+
+    return SeasonModel(team_ids, wins, points_for, schedule, means, deviations, playoff_teams)
@@ -0,0 +1,117 @@
+import os
+
+import data.async_http as async_http
+from data.async_http import AsyncHttpClient
+from data.http_cache import HttpCache, default_directory
+
+BASE_URL = os.getenv("SLEEPER_API_URL", "https://api.sleeper.app/v1").rstrip("/")
+
+# Weekly projections rarely change, live stats and rosters do
+TTL_RULES = [
+    (r'/projections/', 6 * 60 * 60),
+    (r'/stats/', 5 * 60),
+    (r'/players/[^/]+/trending/', 30 * 60),
+    (r'/players/[^/]+$', 24 * 60 * 60),
+    (r'/league/[^/]+/(rosters|matchups|transactions)', 5 * 60),
+    (r'/league/[^/]+/users$', 60 * 60),
+    (r'/league/[^/]+$', 60 * 60),
+]
+
+http_cache = HttpCache(default_directory(), TTL_RULES)
+client = AsyncHttpClient(BASE_URL, http_cache, concurrency=8, rate=10)
+
+
+def get(path: str, params=None, cache: bool = True):
+    """Gets a Sleeper endpoint, relative to BASE_URL, through the response cache."""
+    return async_http.run(client.get(path, params, cache))
+
+
+def get_many(paths) -> list:
+    """Gets several Sleeper endpoints concurrently, results are in the order of the paths."""
+    return async_http.run(client.get_many(list(paths)))
+
+
+def get_week_projections(season_type: str, season, week) -> dict:
+    return get(f"projections/nfl/{season_type}/{season}/{week}")
+
+
+def get_week_projections_many(season_type: str, season, weeks) -> dict:
+    """
+    Gets the projections of several weeks concurrently
+
+    Args:
+        season_type (str): "regular" or "post"
+        season: The season year
+        weeks (list): The week numbers
+
+    Returns:
+        dict: The projections payload of each week, keyed by week number
+    """
+    weeks = list(weeks)
+    payloads = get_many(f"projections/nfl/{season_type}/{season}/{week}" for week in weeks)
+    return dict(zip(weeks, payloads))
+
+
+def projections_version(season_type: str, season, week):
+    """Gets the version of the cached projections of a week, it changes when Sleeper updates them."""
+    return http_cache.version(client.url(f"projections/nfl/{season_type}/{season}/{week}"))
+
+
+def get_week_stats(season_type: str, season, week) -> dict:
+    return get(f"stats/nfl/{season_type}/{season}/{week}")
+
+
+def get_all_players(sport: str = "nfl", cache: bool = True) -> dict:
+    return get(f"players/{sport}", cache=cache)
+
+
+def get_trending_players(sport: str = "nfl", add_drop: str = "add", hours: int = 24, limit: int = 25) -> list:
+    return get(f"players/{sport}/trending/{add_drop}", params={'lookback_hours': hours, 'limit': limit})
+
+
+def get_player_week_score(week_stats: dict, player_id: str) -> dict:
+    """Get a player's points in every scoring format, an empty dict if the player has no stats."""
+    player_stats = week_stats.get(player_id)
+    if not player_stats:
+        return {}
+    return {key: player_stats.get(key) for key in ("pts_ppr", "pts_std", "pts_half_ppr")}
+
+
+def cache_stats() -> dict:
+    """Gets the hit/miss counters of the Sleeper response cache."""
+    return http_cache.stats()
+
+
+class CachedLeague:
+    """
+    Drop-in replacement for sleeper_wrapper.League that reads through the response cache
+
+    Args:
+        league_id: The Sleeper league id
+    """
+
+    def __init__(self, league_id):
+        self.league_id = league_id
+
+    def _get(self, path: str = ""):
+        return get(f"league/{self.league_id}/{path}".rstrip("/"))
+
+    def get_league(self) -> dict:
+        return self._get()
+
+    def get_rosters(self) -> list:
+        return self._get("rosters")
+
+    def get_users(self) -> list:
+        return self._get("users")
+
+    def get_matchups(self, week) -> list:
+        return self._get(f"matchups/{week}")
+
+    def get_transactions(self, week) -> list:
+        return self._get(f"transactions/{week}")
+
+    def prefetch(self, *weeks):
+        """Fetches settings, rosters, users and the matchups of the given weeks concurrently into the cache."""
+        paths = ["", "rosters", "users"] + [f"matchups/{week}" for week in weeks]
+        get_many(f"league/{self.league_id}/{path}".rstrip("/") for path in paths)
@@ -0,0 +1,185 @@
+import threading
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import data.nfl as nfl_data
+
+CATEGORY_COLUMNS = ['player_display_name', 'recent_team', 'position', 'opponent_team']
+STAT_COLUMNS = [
+    'fantasy_points', 'fantasy_points_ppr', 'completions', 'attempts', 'passing_yards', 'passing_tds',
+    'interceptions', 'carries', 'rushing_yards', 'rushing_tds', 'receptions', 'targets', 'receiving_yards',
+    'receiving_tds',
+]
+
+
+class StatsEngine:
+    """
+    Weekly player stats indexed by player
+
+    The frame is sorted by player and week once, with categorical text columns and
+    float32 stats, and the first and last row of every player are kept as offsets.
+    A player's games are then a slice, and windows over the last n games of every
+    player are differences of one cumulative sum.
+
+    Args:
+        weekly (pd.DataFrame): The weekly stats, one row per player per week
+    """
+
+    def __init__(self, weekly: pd.DataFrame):
+        columns = [column for column in CATEGORY_COLUMNS + ['season', 'week'] + STAT_COLUMNS if column in weekly]
+        order = [column for column in ['player_display_name', 'season', 'week'] if column in weekly]
+        df = weekly[columns].dropna(subset=['player_display_name']).sort_values(order, kind='stable')
+        df = df.astype({column: 'category' for column in CATEGORY_COLUMNS if column in df})
+        df = df.astype({column: 'float32' for column in STAT_COLUMNS if column in df})
+        df['week'] = df['week'].astype('int8')
+        self.frame = df.reset_index(drop=True)
+        self.stat_columns = [column for column in STAT_COLUMNS if column in df]
+
+        codes = self.frame['player_display_name'].cat.codes.to_numpy()
+        # Rows of player i are starts[i]:ends[i]
+        boundaries = np.flatnonzero(np.diff(codes)) + 1
+        self.starts = np.concatenate([[0], boundaries])
+        self.ends = np.concatenate([boundaries, [len(codes)]])
+        self.players = list(self.frame['player_display_name'].to_numpy()[self.starts])
+        self.index = {player: idx for idx, player in enumerate(self.players)}
+
+        # Per column arrays, categoricals as codes into their categories, so slicing skips pandas
+        self._arrays = {}
+        for column in self.frame.columns:
+            series = self.frame[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                self._arrays[column] = (series.cat.codes.to_numpy(), np.append(series.cat.categories.to_numpy(dtype=object), None))
+            else:
+                self._arrays[column] = (series.to_numpy(), None)
+        self.positions = self.column_values('position', self.ends - 1) if 'position' in self.frame else None
+
+        values = self.frame[self.stat_columns].to_numpy(dtype=np.float64, na_value=0)
+        self._cumulative = np.vstack([np.zeros((1, len(self.stat_columns))), np.cumsum(values, axis=0)])
+        # Cumulative sums of squares, built for a column the first time its deviation is asked for
+        self._squares = {}
+
+    def __contains__(self, player_name):
+        return player_name in self.index
+
+    def games(self, player_name: str) -> pd.DataFrame:
+        """Gets every game of a player, oldest first, or an empty frame for an unknown player."""
+        idx = self.index.get(player_name)
+        if idx is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[self.starts[idx]:self.ends[idx]]
+
+    def last_games(self, player_name: str, num_games: int) -> pd.DataFrame:
+        """Gets the last num_games games of a player, oldest first."""
+        idx = self.index.get(player_name)
+        if idx is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[max(self.starts[idx], self.ends[idx] - num_games):self.ends[idx]]
+
+    def column_values(self, column: str, rows) -> np.ndarray:
+        """Gets the values of a column at some rows, categoricals decoded, missing categories as None."""
+        values, categories = self._arrays[column]
+        return values[rows] if categories is None else categories[values[rows]]
+
+    def records(self, player_name: str, num_games: int, columns: List[str]) -> List[dict]:
+        """Gets the last num_games games of a player as dicts, newest first."""
+        idx = self.index.get(player_name)
+        if idx is None:
+            return []
+        end = self.ends[idx]
+        rows = np.arange(end - 1, max(self.starts[idx], end - num_games) - 1, -1)
+        values = [self.column_values(column, rows).tolist() for column in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    def rolling_average(self, player_name: str, column: str, window: int) -> pd.Series:
+        """Gets the average of a stat over the previous window games, for every game of a player."""
+        games = self.games(player_name)
+        return games.set_index('week')[column].rolling(window, min_periods=1).mean()
+
+    def average(self, player_name: str, column: str, num_games: int) -> float:
+        """Gets the per-game average of one stat over the last num_games games of a player, 0 for an unknown player."""
+        idx = self.index.get(player_name)
+        if idx is None:
+            return 0.0
+        end = self.ends[idx]
+        start = max(self.starts[idx], end - num_games)
+        position = self.stat_columns.index(column)
+        return float((self._cumulative[end, position] - self._cumulative[start, position]) / (end - start))
+
+    def averages(self, player_names: Optional[Iterable[str]] = None, num_games: int = 4,
+                 columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Gets the per-game averages over the last num_games games of several players at once
+
+        Args:
+            player_names (list): The players, defaults to every player
+            num_games (int): Size of the window
+            columns (list): The stats to average, defaults to every stat
+
+        Returns:
+            pd.DataFrame: One row per known player with a games column and the averaged stats
+        """
+        columns = columns or self.stat_columns
+        if player_names is None:
+            players = np.arange(len(self.players))
+        else:
+            players = np.array([self.index[name] for name in player_names if name in self.index], dtype=int)
+        ends = self.ends[players]
+        starts = np.maximum(self.starts[players], ends - num_games)
+        positions = [self.stat_columns.index(column) for column in columns]
+
+        games = ends - starts
+        totals = self._cumulative[ends][:, positions] - self._cumulative[starts][:, positions]
+        averages = pd.DataFrame(totals / np.maximum(games, 1)[:, None], columns=columns)
+        averages.insert(0, 'games', games)
+        averages.insert(0, 'position', self.positions[players])
+        averages.index = pd.Index([self.players[idx] for idx in players], name='player')
+        return averages
+
+    def deviations(self, player_names: Iterable[str], column: str, num_games: int = 17, min_games: int = 3) -> np.ndarray:
+        """
+        Gets the standard deviation of one stat over the last num_games games of several players at once
+
+        Args:
+            player_names (list): The players
+            column (str): The stat
+            num_games (int): Size of the window
+            min_games (int): Players with fewer games get NaN
+
+        Returns:
+            np.ndarray: One deviation per player in player_names order, NaN for unknown players
+        """
+        squares = self._squares.get(column)
+        if squares is None:
+            values = self.frame[column].to_numpy(dtype=np.float64, na_value=0)
+            squares = np.concatenate([[0.0], np.cumsum(values * values)])
+            self._squares[column] = squares
+        sums = self._cumulative[:, self.stat_columns.index(column)]
+
+        players = np.array([self.index.get(name, -1) for name in player_names], dtype=int)
+        known = players >= 0
+        ends = np.where(known, self.ends[np.maximum(players, 0)], 0)
+        starts = np.where(known, np.maximum(self.starts[np.maximum(players, 0)], ends - num_games), 0)
+        games = ends - starts
+        mean = (sums[ends] - sums[starts]) / np.maximum(games, 1)
+        variance = (squares[ends] - squares[starts]) / np.maximum(games, 1) - mean * mean
+        # Sample variance, clipped for the rounding of the cumulative sums
+        variance = np.maximum(variance, 0) * games / np.maximum(games - 1, 1)
+        return np.where(known & (games >= min_games), np.sqrt(variance), np.nan)
+
+
+_lock = threading.Lock()
+_engine = None
+_engine_source = None
+
+
+def get_stats_engine() -> StatsEngine:
+    """Gets the shared stats engine, rebuilding it when the weekly stats are reloaded."""
+    global _engine, _engine_source
+    weekly = nfl_data.get_weekly_data()
+    with _lock:
+        if _engine is None or _engine_source is not weekly:
+            _engine = StatsEngine(weekly)
+            _engine_source = weekly
+        return _engine
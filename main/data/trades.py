@@ -0,0 +1,183 @@
+import heapq
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import data.lineups as lineups
+import data.players as players
+import data.projections as projections
+from data.values import value_store
+
+# (players given, players received)
+TRADE_SHAPES = [(1, 1), (2, 1), (1, 2), (2, 2)]
+# The other team has to receive at least this share of the FantasyCalc value it gives
+VALUE_TOLERANCE = 0.9
+
+
+def _subsets(count: int, size: int) -> np.ndarray:
+    return np.array(list(combinations(range(count), size)), dtype=int).reshape(-1, size)
+
+
+class TradeSearch:
+    """
+    Trades between one team and the rest of its league, ranked by the rest of season lineup points they add
+
+    Candidates are scored in bulk: every set of 1 or 2 players a team can send has its
+    FantasyCalc value and rest of season points summed once, so the fairness check and
+    an upper bound on the lineup gain of every trade with every team are array
+    operations. The gain of a trade is at most the points of the players received
+    minus what the lineup loses without the players sent, and at most what the players
+    received add to the full roster, so trades are solved exactly best bound first and
+    the search stops once no bound can beat the offers kept. Only the cheapest trade
+    for each set of players received is kept.
+
+    Lineups are solved on rest of season totals, byes are not taken into account.
+
+    Args:
+        rosters (list): Sleeper rosters of the league
+        roster_positions (list): The league's roster_positions
+        points (dict): Rest of season projected points by Sleeper id
+        values (dict): FantasyCalc value by Sleeper id, players without one are not traded
+        positions (dict): Position by Sleeper id
+    """
+
+    def __init__(self, rosters: List[dict], roster_positions: Iterable[str], points: Dict[str, float],
+                 values: Dict[str, float], positions: Dict[str, str]):
+        self.solver = lineups.LineupSolver(roster_positions)
+        self.points = points
+        self.values = values
+        self.positions = positions
+        self.rosters = {}
+        for roster in rosters:
+            benched = set(roster.get('reserve') or []) | set(roster.get('taxi') or [])
+            self.rosters[roster['roster_id']] = [str(player_id) for player_id in roster.get('players') or [] if player_id not in benched]
+        self.solves = 0
+
+    def lineup_points(self, player_ids: List[str]) -> float:
+        self.solves += 1
+        points = np.array([self.points.get(player_id, 0.0) for player_id in player_ids])
+        return self.solver.solve(player_ids, points, [self.positions.get(player_id) for player_id in player_ids])['points']
+
+    def _tradable(self, roster_id) -> List[str]:
+        return [player_id for player_id in self.rosters[roster_id] if self.values.get(player_id, 0) > 0]
+
+    def search(self, roster_id, top_n: int = 10, partners: Optional[Iterable] = None,
+               shapes: Iterable[tuple] = TRADE_SHAPES, tolerance: float = VALUE_TOLERANCE) -> List[dict]:
+        """
+        Finds the trades that add the most rest of season lineup points to a team
+
+        Args:
+            roster_id: The team looking for trades
+            top_n (int): Number of offers to return
+            partners (list): Roster ids to trade with, defaults to every other team
+            shapes (list): (players given, players received) sizes to enumerate
+            tolerance (float): Share of the value it gives the other team has to receive
+
+        Returns:
+            list: Offers, best first, each a dict with partner, give, get, gain, value_given and value_received
+        """
+        roster = self.rosters[roster_id]
+        base = self.lineup_points(roster)
+        mine = self._tradable(roster_id)
+        my_values = np.array([self.values[player_id] for player_id in mine], dtype=float)
+
+        # What the lineup loses without each set of players sent, solved once for every partner
+        sent = {}
+        for size in {give for give, _ in shapes}:
+            subsets = _subsets(len(mine), size)
+            losses = np.array([
+                base - self.lineup_points([player_id for player_id in roster if player_id not in {mine[idx] for idx in subset}])
+                for subset in subsets
+            ])
+            sent[size] = (subsets, my_values[subsets].sum(axis=1), losses)
+
+        partners = list(partners or [other for other in self.rosters if other != roster_id])
+        bounds, trades = [], []
+        for partner in partners:
+            theirs = self._tradable(partner)
+            their_values = np.array([self.values[player_id] for player_id in theirs], dtype=float)
+            their_points = np.array([self.points.get(player_id, 0.0) for player_id in theirs])
+            for give, get in shapes:
+                give_subsets, give_values, losses = sent[give]
+                get_subsets = _subsets(len(theirs), get)
+                if not len(give_subsets) or not len(get_subsets):
+                    continue
+                get_values = their_values[get_subsets].sum(axis=1)
+                bound = their_points[get_subsets].sum(axis=1)[None, :] - losses[:, None]
+                fair = give_values[:, None] >= tolerance * get_values[None, :]
+                give_idx, get_idx = np.nonzero(fair & (bound > 0))
+                bounds.append(bound[give_idx, get_idx])
+                trades.append((partner, theirs, give_subsets[give_idx], get_subsets[get_idx], give_values[give_idx], get_values[get_idx]))
+        if not bounds:
+            return []
+
+        # Best bound first, stop once the bound cannot beat the offers kept
+        flat = np.concatenate(bounds)
+        offsets = np.cumsum([0] + [len(bound) for bound in bounds])
+        offers, threshold, added = {}, 0.0, {}
+        for candidate in np.argsort(-flat, kind='stable'):
+            bound = flat[candidate]
+            if len(offers) >= top_n and bound <= threshold:
+                break
+            owner = np.searchsorted(offsets, candidate, side='right') - 1
+            partner, theirs, give_subsets, get_subsets, give_values, get_values = trades[owner]
+            idx = candidate - offsets[owner]
+            get = tuple(theirs[player] for player in get_subsets[idx])
+            key = (partner, get)
+            # Removing players never helps a lineup, so a trade adds at most what the players received add on their own
+            if key not in added:
+                added[key] = self.lineup_points(roster + list(get)) - base
+            bound = min(bound, added[key])
+            kept = offers.get(key)
+            if len(offers) >= top_n and bound <= threshold:
+                continue
+            if kept is not None and (kept['gain'], -kept['value_given']) >= (bound, -give_values[idx]):
+                continue
+
+            give = [mine[player] for player in give_subsets[idx]]
+            gain = self.lineup_points([player_id for player_id in roster if player_id not in give] + list(get)) - base
+            if gain <= 0 or kept is not None and (kept['gain'], -kept['value_given']) >= (gain, -give_values[idx]):
+                continue
+            offers[key] = {
+                'partner': partner, 'give': give, 'get': list(get), 'gain': gain,
+                'value_given': float(give_values[idx]), 'value_received': float(get_values[idx]),
+            }
+            if len(offers) >= top_n:
+                threshold = heapq.nlargest(top_n, (offer['gain'] for offer in offers.values()))[-1]
+        return sorted(offers.values(), key=lambda offer: (-offer['gain'], offer['value_given']))[:top_n]
+
+
+def search_trades(rosters: List[dict], roster_positions: Iterable[str], roster_id, week: int, scoring_format: str = 'ppr',
+                  season=None, registry=None, top_n: int = 10, partners: Optional[Iterable] = None, **league_format) -> List[dict]:
+    """
+    Finds the best trades for a team from the rest of season projections and FantasyCalc values
+
+    Args:
+        rosters (list): Sleeper rosters of the league
+        roster_positions (list): The league's roster_positions
+        roster_id: The team looking for trades
+        week (int): The first week of the rest of the season
+        scoring_format (str): "ppr", "half_ppr" or "std"
+        season: The season year, defaults to the season in globals
+        registry (PlayerRegistry): Positions of the players, defaults to the shared registry
+        top_n (int): Number of offers to return
+        partners (list): Roster ids to trade with, defaults to every other team
+        **league_format: league_type, ppr and league_size of the FantasyCalc values
+
+    Returns:
+        list: Offers, best first, see TradeSearch.search
+    """
+    registry = registry or players.get_registry()
+    player_ids = [str(player_id) for roster in rosters for player_id in roster.get('players') or []]
+    matrix = projections.get_projection_matrix(season)
+    points = matrix.rest_of_season(week, projections.SEASON_WEEKS, scoring_format, player_ids)
+    records = value_store.get_values(player_ids, **league_format)
+
+    search = TradeSearch(
+        rosters, roster_positions,
+        points=dict(zip(player_ids, points.tolist())),
+        values={player_id: float(record['value']) for player_id, record in zip(player_ids, records) if record is not None},
+        positions={player_id: getattr(registry.get(player_id), 'position', None) for player_id in player_ids},
+    )
+    return search.search(roster_id, top_n, partners)
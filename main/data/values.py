@@ -0,0 +1,98 @@
+import os
+import threading
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from data.ids import RANKINGS_DIR
+
+
+def _format_ppr(ppr) -> str:
+    ppr = float(ppr)
+    return str(int(ppr)) if ppr.is_integer() else str(ppr)
+
+
+def rankings_path(league_type: str = 'redraft', ppr=1, league_size: int = 12) -> str:
+    """
+    Gets the FantasyCalc rankings file for a league format
+
+    Looks for {league_type}_{ppr}_{league_size}.csv first and falls back to
+    fantasycalc_{league_type}_rankings.csv.
+
+    Args:
+        league_type (str): 'redraft' or 'dynasty'
+        ppr: Points per reception, 0, 0.5 or 1
+        league_size (int): The number of teams in the league
+
+    Returns:
+        str: The path of the rankings file
+    """
+    path = os.path.join(RANKINGS_DIR, f'{league_type}_{_format_ppr(ppr)}_{league_size}.csv')
+    if os.path.exists(path):
+        return os.path.abspath(path)
+    return os.path.abspath(os.path.join(RANKINGS_DIR, f'fantasycalc_{league_type}_rankings.csv'))
+
+
+class ValueTable:
+    """FantasyCalc values from one rankings file, keyed by Sleeper id."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        df = pd.read_csv(path, sep=';', encoding='utf-8-sig', dtype={'sleeperId': str})
+        df = df.dropna(subset=['sleeperId']).drop_duplicates('sleeperId')
+        self._records = {
+            record['sleeperId']: record
+            for record in df[['name', 'position', 'sleeperId', 'value', 'overallRank', 'positionRank', 'trend30day']].to_dict(orient='records')
+        }
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, sleeper_id) -> Optional[dict]:
+        return None if sleeper_id is None else self._records.get(str(sleeper_id))
+
+
+class ValueStore:
+    """
+    Loads each rankings file once and reloads it when the file changes on disk
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+
+    def table(self, league_type: str = 'redraft', ppr=1, league_size: int = 12) -> ValueTable:
+        path = rankings_path(league_type, ppr, league_size)
+        with self._lock:
+            table = self._tables.get(path)
+            if table is None or os.path.getmtime(path) != table.mtime:
+                table = ValueTable(path)
+                self._tables[path] = table
+            return table
+
+    def version(self) -> tuple:
+        """Gets the modification times of the loaded rankings files, it changes when one is reloaded."""
+        with self._lock:
+            return tuple(sorted((path, table.mtime) for path, table in self._tables.items()))
+
+    def get_value(self, sleeper_id, **league_format) -> Optional[dict]:
+        """
+        Gets the FantasyCalc record of a player
+
+        Args:
+            sleeper_id: The Sleeper id of the player
+            **league_format: league_type, ppr and league_size, see rankings_path
+
+        Returns:
+            dict: name, position, value, overallRank, positionRank and trend30day, or None
+        """
+        return self.table(**league_format).get(sleeper_id)
+
+    def get_values(self, sleeper_ids: Iterable, **league_format) -> List[Optional[dict]]:
+        """Gets the FantasyCalc records of several players in one pass, None for missing players."""
+        table = self.table(**league_format)
+        return [table.get(sleeper_id) for sleeper_id in sleeper_ids]
+
+
+value_store = ValueStore()
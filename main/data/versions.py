@@ -0,0 +1,29 @@
+import hashlib
+
+import data.nfl as nfl_data
+import data.sleeper_api as sleeper_api
+import data.values as values
+import globals
+
+
+def data_version(week: int = None) -> str:
+    """
+    Gets a fingerprint of the data snapshots the tools read
+
+    It changes when the nflverse frames are reloaded, a FantasyCalc rankings file
+    changes or Sleeper updates the cached projections of the week. Nothing is
+    fetched, so it is cheap enough to compute for every question.
+
+    Args:
+        week (int): The week whose projections count, defaults to the current week in globals
+
+    Returns:
+        str: A short hex digest
+    """
+    week = week or globals.get_week()
+    parts = (
+        nfl_data.version(),
+        values.value_store.version(),
+        sleeper_api.projections_version("regular", globals.get_season(), week),
+    )
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:12]
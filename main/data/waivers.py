@@ -0,0 +1,145 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+import data.players as players
+import data.projections as projections
+from data.sleeper_api import CachedLeague
+
+FANTASY_POSITIONS = ["QB", "RB", "WR", "TE", "K", "DEF"]
+# Rosters are read again from scratch this often, in between transactions are applied one by one
+ROSTER_RESYNC = 60 * 60
+
+
+class WaiverEngine:
+    """
+    Free agents of a league ranked by projected points over a horizon of weeks
+
+    Rostered flags and positions are arrays aligned with the rows of the projection
+    matrix, so the free-agent pool of a position is a boolean mask and the best
+    players are found with a partial selection. Completed transactions are applied
+    to the flags as they come in instead of reading every roster again.
+
+    Args:
+        league_id: The Sleeper league id
+        matrix (ProjectionMatrix): Projections of the season
+        registry (PlayerRegistry): Positions of the players
+    """
+
+    def __init__(self, league_id, matrix, registry):
+        self.league = CachedLeague(league_id)
+        self.matrix = matrix
+        self.registry = registry
+        self.rostered = np.zeros(0, dtype=bool)
+        self.positions = np.zeros(0, dtype=np.int8)
+        self.applied = set()
+        self.synced = 0.0
+        self._lock = threading.Lock()
+
+    def _extend(self):
+        # The matrix gains rows when Sleeper projects new players
+        missing = len(self.matrix.player_ids) - len(self.positions)
+        if missing > 0:
+            new_ids = self.matrix.player_ids[len(self.positions):]
+            codes = [
+                FANTASY_POSITIONS.index(position) if position in FANTASY_POSITIONS else -1
+                for position in (getattr(self.registry.get(player_id), 'position', None) for player_id in new_ids)
+            ]
+            self.positions = np.concatenate([self.positions, np.array(codes, dtype=np.int8)])
+            self.rostered = np.concatenate([self.rostered, np.zeros(missing, dtype=bool)])
+
+    def resync(self):
+        """Reads every roster and rebuilds the rostered flags."""
+        with self._lock:
+            self._extend()
+            self.rostered[:] = False
+            for roster in self.league.get_rosters() or []:
+                for player_id in roster.get("players") or []:
+                    row = self.matrix.index.get(str(player_id))
+                    if row is not None:
+                        self.rostered[row] = True
+            self.synced = time.time()
+
+    def apply_transactions(self, transactions: Iterable[dict]) -> int:
+        """
+        Applies completed adds and drops that were not applied yet
+
+        Returns:
+            int: The number of transactions applied
+        """
+        applied = 0
+        with self._lock:
+            self._extend()
+            for transaction in transactions:
+                transaction_id = transaction.get("transaction_id")
+                if transaction.get("status") != "complete" or transaction_id in self.applied:
+                    continue
+                for player_id in (transaction.get("drops") or {}):
+                    row = self.matrix.index.get(str(player_id))
+                    if row is not None:
+                        self.rostered[row] = False
+                for player_id in (transaction.get("adds") or {}):
+                    row = self.matrix.index.get(str(player_id))
+                    if row is not None:
+                        self.rostered[row] = True
+                self.applied.add(transaction_id)
+                applied += 1
+        return applied
+
+    def sync(self, week: int) -> int:
+        """Brings the rostered flags up to date, a full resync once an hour and the week's transactions otherwise."""
+        if time.time() - self.synced > ROSTER_RESYNC:
+            self.resync()
+            # The rosters already include every transaction so far
+            with self._lock:
+                self.applied.update(transaction.get("transaction_id") for transaction in self.league.get_transactions(week) or [])
+            return 0
+        return self.apply_transactions(self.league.get_transactions(week) or [])
+
+    def top(self, weeks: Iterable[int], positions: Iterable[str] = None, top_n: int = 10,
+            scoring_format: str = "ppr") -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Gets the best free agents of each position
+
+        Args:
+            weeks (list): The week numbers projected points are summed over
+            positions (list): The positions, defaults to every fantasy position
+            top_n (int): Number of players per position
+            scoring_format (str): "ppr", "half_ppr" or "std"
+
+        Returns:
+            dict: (Sleeper id, projected points) pairs per position, best first
+        """
+        totals = self.matrix.totals(list(weeks), scoring_format)
+        with self._lock:
+            self._extend()
+            available = ~self.rostered[:len(totals)] & (totals > 0)
+            player_positions = self.positions[:len(totals)]
+
+        best = {}
+        for position in positions or FANTASY_POSITIONS:
+            candidates = np.flatnonzero(available & (player_positions == FANTASY_POSITIONS.index(position)))
+            if len(candidates) > top_n:
+                candidates = candidates[np.argpartition(-totals[candidates], top_n)[:top_n]]
+            candidates = candidates[np.argsort(-totals[candidates], kind='stable')]
+            best[position] = [(self.matrix.player_ids[idx], float(totals[idx])) for idx in candidates]
+        return best
+
+
+_lock = threading.Lock()
+_engines = {}
+
+
+def get_waiver_engine(league_id, week: int, season=None, season_type: str = "regular") -> WaiverEngine:
+    """Gets the shared waiver engine of a league, synced with the transactions of the week."""
+    matrix = projections.get_projection_matrix(season, season_type)
+    key = (str(league_id), matrix.season, season_type)
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = WaiverEngine(league_id, matrix, players.get_registry())
+            _engines[key] = engine
+    engine.sync(week)
+    return engine
@@ -1,6 +1,10 @@
 scoring_type = 1
 league_id = 1131774234440876032
 team_name = 'itsGarrin'
+league_type = 'redraft'
+league_size = 12
+season = 2024
+week = 14
 
 def set_scoring_type(value):
     global scoring_type
@@ -21,4 +25,32 @@ def set_team_name(value):
     team_name = value
 
 def get_team_name():
-    return team_name
\ No newline at end of file
+    return team_name
+
+def set_league_type(value):
+    global league_type
+    league_type = value
+
+def get_league_type():
+    return league_type
+
+def set_league_size(value):
+    global league_size
+    league_size = value
+
+def get_league_size():
+    return league_size
+
+def set_season(value):
+    global season
+    season = value
+
+def get_season():
+    return season
+
+def set_week(value):
+    global week
+    week = value
+
+def get_week():
+    return week
@@ -0,0 +1,140 @@
+import inspect
+import json
+import os
+from collections import namedtuple
+
+MODEL = 'llama3.1'
+
+ToolCall = namedtuple('ToolCall', ['name', 'arguments', 'id'])
+
+
+class OllamaBackend:
+    """
+    Streams chat completions from a local Ollama server
+
+    stream() yields {'type': 'token', 'content': str} events while the answer is
+    generated and ends with one {'type': 'message', 'content': str,
+    'tool_calls': [ToolCall], 'usage': dict} event.
+    """
+
+    def __init__(self, model=MODEL):
+        self.model = model
+
+    def stream(self, messages, tools=None):
+        from ollama import chat  # imported on first use, it is slow to import
+
+        content = ''
+        tool_calls = []
+        usage = {}
+        for chunk in chat(model=self.model, messages=messages, tools=tools, stream=True):
+            if chunk.message.content:
+                content += chunk.message.content
+                yield {'type': 'token', 'content': chunk.message.content}
+            for tool in chunk.message.tool_calls or []:
+                tool_calls.append(ToolCall(tool.function.name, dict(tool.function.arguments or {}), None))
+            if chunk.done:
+                usage = {'prompt_tokens': chunk.prompt_eval_count or 0, 'completion_tokens': chunk.eval_count or 0}
+        yield {'type': 'message', 'content': content, 'tool_calls': tool_calls, 'usage': usage}
+
+    def assistant_message(self, content, tool_calls):
+        return {
+            'role': 'assistant',
+            'content': content,
+            'tool_calls': [{'function': {'name': call.name, 'arguments': call.arguments}} for call in tool_calls],
+        }
+
+    def tool_message(self, call, output):
+        return {'role': 'tool', 'content': str(output), 'name': call.name}
+
+
+_JSON_TYPES = {str: 'string', int: 'integer', float: 'number', bool: 'boolean'}
+
+
+def function_schema(function):
+    """Builds an OpenAI tool definition from a tool function's signature and docstring summary."""
+    signature = inspect.signature(function)
+    doc = inspect.getdoc(function) or ''
+    properties = {}
+    required = []
+    for name, parameter in signature.parameters.items():
+        annotation = parameter.annotation
+        if annotation is inspect.Parameter.empty and parameter.default is not inspect.Parameter.empty:
+            annotation = type(parameter.default)
+        properties[name] = {'type': _JSON_TYPES.get(annotation, 'string')}
+        if parameter.default is inspect.Parameter.empty:
+            required.append(name)
+    return {
+        'type': 'function',
+        'function': {
+            'name': function.__name__,
+            'description': doc.split('\n\n')[0].strip(),
+            'parameters': {'type': 'object', 'properties': properties, 'required': required},
+        },
+    }
+
+
+class OpenAIBackend:
+    """
+    Streams chat completions from any OpenAI-compatible server, e.g. vLLM or a local stub
+
+    Emits the same events as OllamaBackend.
+
+    Args:
+        model (str): The model name
+        base_url (str): The server url, defaults to the URL environment variable
+        api_key (str): The api key, defaults to the KEY environment variable
+    """
+
+    def __init__(self, model, base_url=None, api_key=None):
+        from openai import OpenAI
+
+        self.model = model
+        self.client = OpenAI(base_url=base_url or os.getenv("URL"), api_key=api_key or os.getenv("KEY") or "none")
+
+    def stream(self, messages, tools=None):
+        kwargs = {'tools': [function_schema(tool) for tool in tools]} if tools else {}
+        response = self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=True, stream_options={'include_usage': True}, **kwargs,
+        )
+
+        content = ''
+        partial_calls = {}
+        usage = {}
+        for chunk in response:
+            if chunk.usage:
+                usage = {'prompt_tokens': chunk.usage.prompt_tokens, 'completion_tokens': chunk.usage.completion_tokens}
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content += delta.content
+                yield {'type': 'token', 'content': delta.content}
+            # Tool calls arrive in pieces, the arguments json is split across chunks
+            for tool in delta.tool_calls or []:
+                call = partial_calls.setdefault(tool.index, {'id': None, 'name': '', 'arguments': ''})
+                call['id'] = tool.id or call['id']
+                if tool.function and tool.function.name:
+                    call['name'] += tool.function.name
+                if tool.function and tool.function.arguments:
+                    call['arguments'] += tool.function.arguments
+
+        tool_calls = []
+        for _, call in sorted(partial_calls.items()):
+            try:
+                arguments = json.loads(call['arguments'] or '{}')
+            except ValueError:
+                arguments = {}
+            tool_calls.append(ToolCall(call['name'], arguments, call['id']))
+        yield {'type': 'message', 'content': content, 'tool_calls': tool_calls, 'usage': usage}
+
+    def assistant_message(self, content, tool_calls):
+        message = {'role': 'assistant', 'content': content or None}
+        if tool_calls:
+            message['tool_calls'] = [
+                {'id': call.id, 'type': 'function', 'function': {'name': call.name, 'arguments': json.dumps(call.arguments)}}
+                for call in tool_calls
+            ]
+        return message
+
+    def tool_message(self, call, output):
+        return {'role': 'tool', 'tool_call_id': call.id, 'content': str(output)}
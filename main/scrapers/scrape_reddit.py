@@ -1,29 +1,64 @@
+import json
+import logging
 import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, UTC, timezone
 
 import pandas as pd
-import praw
 from dotenv import load_dotenv
-from huggingface_hub import HfApi
+
+from data.ratelimit import RateLimiter
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Hugging Face Configurations
 HF_TOKEN = os.getenv("HF_TOKEN")  # Replace with your token
 REPO_ID = os.getenv("REPO_ID")  # Replace with your repo ID
 
-# Reddit API Configuration
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID"),
-    client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-    password=os.getenv("REDDIT_PASSWORD"),
-    user_agent="fantasyfootballdata",
-    username="joindaclub",
-)
-
-
-def extract_links_from_post(submission_id):
+# Reddit allows 100 requests per minute to an OAuth client
+REDDIT_RATE = 100 / 60
+REDDIT_BURST = 10
+WORKERS = 4
+CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "parquet", "reddit_checkpoint.jsonl")
+
+_reddit = None
+_reddit_lock = threading.Lock()
+# Shared by every worker, each request to Reddit takes a token
+limiter = RateLimiter(REDDIT_RATE, burst=REDDIT_BURST)
+
+
+def get_reddit():
+    """Gets the shared Reddit client, created on first use from the REDDIT_* environment variables."""
+    global _reddit
+    with _reddit_lock:
+        if _reddit is None:
+            import praw
+
+            _reddit = praw.Reddit(
+                client_id=os.getenv("REDDIT_CLIENT_ID"),
+                client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+                password=os.getenv("REDDIT_PASSWORD"),
+                user_agent="fantasyfootballdata",
+                username="joindaclub",
+            )
+        return _reddit
+
+
+def set_reddit(client):
+    """Replaces the shared Reddit client, for example with a fake serving recorded threads."""
+    global _reddit
+    with _reddit_lock:
+        _reddit = client
+
+
+def extract_links_from_post(submission_id, reddit=None):
+    reddit = reddit or get_reddit()
+    limiter.acquire()
     submission = reddit.submission(id=submission_id)
 
     # Full selftext
@@ -62,9 +97,19 @@ def collect_answers_from_comment(comment, question_id):
     return answers
 
 
-def scrape_thread_content(thread_url):
+def expand_comments(thread):
+    """Loads every collapsed comment of a thread, one rate limited request at a time."""
+    while True:
+        limiter.acquire()
+        if not thread.comments.replace_more(limit=1):
+            return
+
+
+def scrape_thread_content(thread_url, reddit=None):
+    reddit = reddit or get_reddit()
     # Extract thread ID from the URL
     thread_id = thread_url.split("/")[-3]
+    limiter.acquire()
     thread = reddit.submission(id=thread_id)
 
     # Extract thread details
@@ -76,7 +121,7 @@ def scrape_thread_content(thread_url):
     }
 
     # Scrape comments
-    thread.comments.replace_more(limit=None)
+    expand_comments(thread)
     comments = list(thread.comments.list())
 
     # Iterate over all comments and treat only parent comments as questions
@@ -129,7 +174,38 @@ def classify_thread_type(title):
         return "General"  # Default category
 
 
-def scrape_daily_post_threads(post_ids):
+def load_checkpoint(checkpoint_path):
+    """Reads the threads already scraped, by url. A line cut off by a crash is ignored."""
+    finished = {}
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                finished[entry["link"]] = entry["thread"]
+    return finished
+
+
+def scrape_daily_post_threads(post_ids, reddit=None, workers=WORKERS, checkpoint_path=CHECKPOINT_PATH):
+    """
+    Scrapes the Q&A pairs of every "Official:" thread linked from the daily index posts
+
+    Threads are scraped by a pool of workers sharing the Reddit rate limiter. Each
+    finished thread is appended to the checkpoint file, so a rerun only scrapes the
+    threads that were not finished yet.
+
+    Args:
+        post_ids (list): Ids of the daily index posts
+        reddit: The Reddit client, defaults to the shared one
+        workers (int): Number of threads scraped at once
+        checkpoint_path (str): The checkpoint file, None to scrape everything without one
+
+    Returns:
+        dict: Q&A pairs by thread type
+    """
+    reddit = reddit or get_reddit()
     # Dictionary to store Q&A pairs for each thread type
     threads_data = {
         "Add_Drop": [],
@@ -142,37 +218,79 @@ def scrape_daily_post_threads(post_ids):
         "General": [],
     }
 
+    links = []
     for post_id in post_ids:
         # Get all links from the daily post
-        links = extract_links_from_post(post_id)
-        print(f"Found {len(links)} threads from post ID {post_id}.")
-
-        for link in links:
-            thread_data = scrape_thread_content(link)
-
-            # Classify thread by its title
-            thread_type = classify_thread_type(thread_data["title"])
-
-            # Store Q&A pairs in the corresponding thread type category
-            for qa_pair in thread_data["qa_pairs"]:
-                question = qa_pair["question"]
-                question_author = qa_pair["question_author"]
-                for answer in qa_pair["answers"]:
-                    threads_data[thread_type].append(
-                        {
-                            "thread_title": thread_data["title"],
-                            "thread_url": thread_data["url"],
-                            "question": question,
-                            "question_author": question_author,
-                            "answer": answer["answer"],
-                            "answer_author": answer["author"],
-                        }
-                    )
+        post_links = extract_links_from_post(post_id, reddit)
+        logger.info("Found %s threads from post ID %s.", len(post_links), post_id)
+        links.extend(post_links)
+    links = list(dict.fromkeys(links))
+
+    finished = load_checkpoint(checkpoint_path)
+    pending = [link for link in links if link not in finished]
+    logger.info("%s threads to scrape, %s already in the checkpoint.", len(pending), len(links) - len(pending))
+
+    if checkpoint_path:
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+    started = time.monotonic()
+    pairs = failed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reddit") as pool:
+        futures = {pool.submit(scrape_thread_content, link, reddit): link for link in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            link = futures[future]
+            try:
+                thread_data = future.result()
+            except Exception as e:
+                logger.warning("Failed to scrape %s: %s", link, e)
+                failed += 1
+                continue
+            finished[link] = thread_data
+            if checkpoint_path:
+                # Only this thread writes the checkpoint, the workers hand their results back
+                with open(checkpoint_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"link": link, "thread": thread_data}) + "\n")
+
+            pairs += len(thread_data["qa_pairs"])
+            elapsed = time.monotonic() - started
+            logger.info(
+                "Scraped %s/%s threads, %.1f threads/min, %.1f questions/min",
+                done, len(pending), done / elapsed * 60, pairs / elapsed * 60,
+            )
+    logger.info(
+        "Scraped %s threads in %.0fs, %s failed and will be retried on the next run.",
+        len(pending) - failed, time.monotonic() - started, failed,
+    )
+
+    for link in links:
+        thread_data = finished.get(link)
+        if thread_data is None:
+            continue
+
+        # Classify thread by its title
+        thread_type = classify_thread_type(thread_data["title"])
+
+        # Store Q&A pairs in the corresponding thread type category
+        for qa_pair in thread_data["qa_pairs"]:
+            question = qa_pair["question"]
+            question_author = qa_pair["question_author"]
+            for answer in qa_pair["answers"]:
+                threads_data[thread_type].append(
+                    {
+                        "thread_title": thread_data["title"],
+                        "thread_url": thread_data["url"],
+                        "question": question,
+                        "question_author": question_author,
+                        "answer": answer["answer"],
+                        "answer_author": answer["author"],
+                    }
+                )
 
     return threads_data
 
 
-def get_index_thread_ids(username, days):
+def get_index_thread_ids(username, days, reddit=None):
+    reddit = reddit or get_reddit()
+    limiter.acquire()
     user = reddit.redditor(username)
     thread_ids = []
     cutoff_date = datetime.now(UTC) - timedelta(days=days)
@@ -192,6 +310,8 @@ def upload_to_huggingface(file_path, repo_id):
     """
     Upload a file to Hugging Face dataset hub.
     """
+    from huggingface_hub import HfApi
+
     api = HfApi()
     try:
         # Upload file to Hugging Face Hub
@@ -202,13 +322,14 @@ def upload_to_huggingface(file_path, repo_id):
             token=HF_TOKEN,
             repo_type="dataset",
         )
-        print(f"Uploaded {file_path} to {repo_id}")
+        logger.info("Uploaded %s to %s", file_path, repo_id)
     except Exception as e:
-        print(f"Failed to upload {file_path}: {e}")
+        logger.warning("Failed to upload %s: %s", file_path, e)
 
 
 # Usage Example
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     username = "ffbot"
     days = 7  # Number of days to scrape
     post_ids = get_index_thread_ids(username, days)
@@ -226,4 +347,4 @@ if __name__ == "__main__":
             # Upload the file to Hugging Face
             upload_to_huggingface(file_name, REPO_ID)
 
-            print(f"Saved {len(df)} Q&A pairs for {thread_type} to {file_name}")
+            logger.info("Saved %s Q&A pairs for %s to %s", len(df), thread_type, file_name)
@@ -1,57 +1,121 @@
-from sleeper_wrapper import League, Players, Stats
+import hashlib
+import time
+
+import data.lineups as lineups
+import data.players as players
+import data.sleeper_api as sleeper_api
+import data.waivers as waivers
+from data.sleeper_api import CachedLeague
 import globals
 
-def get_player_name_from_id(player_id, player_data):
+SNAPSHOT_TTL = 5 * 60
+
+
+class LeagueSnapshot:
+    """
+    Settings, users and rosters of a league, fetched once and indexed
+
+    Every league function takes a snapshot instead of a sleeper_wrapper League,
+    so labelling rosters costs no extra requests.
+
+    Args:
+        league_id: The Sleeper league id
+    """
+
+    def __init__(self, league_id):
+        self.league_id = league_id
+        self.league = CachedLeague(league_id)
+        self.created = time.time()
+        self.settings, self.rosters, self.users = sleeper_api.get_many(
+            f"league/{league_id}/{path}".rstrip("/") for path in ["", "rosters", "users"]
+        )
+        self.settings = self.settings or {}
+        self.rosters = self.rosters or []
+        self.users = self.users or []
+
+        users_by_id = {user["user_id"]: user for user in self.users}
+        self.roster_by_id = {roster["roster_id"]: roster for roster in self.rosters}
+        self.roster_by_owner = {roster["owner_id"]: roster for roster in self.rosters if roster.get("owner_id")}
+        self.team_names = {
+            roster["roster_id"]: users_by_id.get(roster.get("owner_id"), {}).get("display_name", "Unknown Team")
+            for roster in self.rosters
+        }
+        self.roster_by_team_name = {
+            user["display_name"].lower(): self.roster_by_owner[user["user_id"]]
+            for user in self.users
+            if user.get("display_name") and user["user_id"] in self.roster_by_owner
+        }
+        self.player_owner = {
+            player_id: roster["roster_id"] for roster in self.rosters for player_id in roster.get("players") or []
+        }
+        # Changes whenever a player is added, dropped or traded
+        self.roster_hash = hashlib.sha1(repr(sorted(
+            (roster["roster_id"], sorted(roster.get("players") or [])) for roster in self.rosters
+        )).encode()).hexdigest()[:12]
+
+    def team_name(self, roster_id) -> str:
+        return self.team_names.get(roster_id, "Unknown Team")
+
+    def roster_for_team(self, team_name):
+        return self.roster_by_team_name.get(team_name.lower())
+
+    def get_matchups(self, week) -> list:
+        return self.league.get_matchups(week) or []
+
+    def get_transactions(self, week) -> list:
+        return self.league.get_transactions(week) or []
+
+
+_snapshots = {}
+
+
+def get_league_snapshot(league_id, max_age=SNAPSHOT_TTL) -> LeagueSnapshot:
+    """Gets a shared snapshot of a league, fetching a new one when it is older than max_age seconds."""
+    snapshot = _snapshots.get(str(league_id))
+    if snapshot is None or time.time() - snapshot.created > max_age:
+        snapshot = LeagueSnapshot(league_id)
+        _snapshots[str(league_id)] = snapshot
+    return snapshot
+
+
+def get_player_name_from_id(player_id, registry):
     """Convert Sleeper player ID to full name, or return the player ID if it's not numeric."""
     if not player_id.isdigit():
         return player_id  # Return player_id as is if it's not a number
 
-    return player_data.get(player_id, {}).get('full_name', player_id)
+    return registry.name(player_id, default=player_id)
 
 
-def get_team_name_from_roster_id(roster_id, league):
+def get_team_name_from_roster_id(roster_id, snapshot):
     """Get team name from roster ID."""
-    users = league.get_users()
-    rosters = league.get_rosters()
-    owner_id = next((roster["owner_id"] for roster in rosters if roster["roster_id"] == roster_id), None)
-
-    for user in users:
-        if user["user_id"] == owner_id:
-            return user["display_name"]
-    return "Unknown Team"
+    return snapshot.team_name(roster_id)
 
 
-def get_team_roster(team_name, league, player_data):
+def get_team_roster(team_name, snapshot, registry):
     """Retrieve roster details for a specific team."""
-    rosters = league.get_rosters()
-    users = league.get_users()
-
-    for user in users:
-        if user["display_name"].lower() == team_name.lower():
-            owner_id = user["user_id"]
-            for roster in rosters:
-                if roster["owner_id"] == owner_id:
-                    return {
-                        "team_name": team_name,
-                        "owner_id": owner_id,
-                        "players": [
-                            get_player_name_from_id(player_id, player_data) for player_id in roster.get("players", [])
-                        ],
-                        "starters": [
-                            get_player_name_from_id(player_id, player_data) for player_id in roster.get("starters", [])
-                        ],
-                        "roster_id": roster["roster_id"],
-                    }
-    return None
-
-
-def get_league_standings(league, player_data):
+    roster = snapshot.roster_for_team(team_name)
+    if roster is None:
+        return None
+
+    return {
+        "team_name": team_name,
+        "owner_id": roster["owner_id"],
+        "players": [
+            get_player_name_from_id(player_id, registry) for player_id in roster.get("players") or []
+        ],
+        "starters": [
+            get_player_name_from_id(player_id, registry) for player_id in roster.get("starters") or []
+        ],
+        "roster_id": roster["roster_id"],
+    }
+
+
+def get_league_standings(snapshot, registry):
     """Retrieve league standings with readable team names."""
-    rosters = league.get_rosters()
     standings = []
-    for roster in rosters:
+    for roster in snapshot.rosters:
         standings.append({
-            "team_name": get_team_name_from_roster_id(roster["roster_id"], league),
+            "team_name": snapshot.team_name(roster["roster_id"]),
             "wins": roster.get("settings", {}).get("wins", 0),
             "losses": roster.get("settings", {}).get("losses", 0),
             "points_for": roster.get("settings", {}).get("fpts", 0)
@@ -59,63 +123,49 @@ def get_league_standings(league, player_data):
     return sorted(standings, key=lambda x: (-x["wins"], -x["points_for"]))
 
 
-def get_matchups(league, week, player_data):
+def get_matchups(snapshot, week, registry):
     """Retrieve weekly matchups with players and team names."""
-    matchups = league.get_matchups(week)
-    rosters = league.get_rosters()
-
-    roster_map = {roster["roster_id"]: get_team_name_from_roster_id(roster["roster_id"], league) for roster in rosters}
-    readable_matchups = []
+    matchups = snapshot.get_matchups(week)
 
-    # Iterate over matchups to find both teams in each matchup
+    # Both teams of a game share a matchup_id
+    games = {}
     for matchup in matchups:
-        team1_roster_id = matchup["roster_id"]  # Team 1's roster ID
-        # Find the opponent's roster ID (assumes the matchup has two teams)
-        opponent_roster_id = next((roster["roster_id"] for roster in rosters if roster["roster_id"] != team1_roster_id), None)
+        if matchup.get("matchup_id") is not None:
+            games.setdefault(matchup["matchup_id"], []).append(matchup)
 
-        if opponent_roster_id:
-            team1_name = roster_map.get(team1_roster_id, "Unknown Team")
-            team2_name = roster_map.get(opponent_roster_id, "Unknown Team")
-
-            # Get players for each team
-            team1_players = [get_player_name_from_id(player_id, player_data) for player_id in matchup.get("starters", [])]
-            team2_players = []
-
-            # Find opponent's players
-            for roster in rosters:
-                if roster["roster_id"] == opponent_roster_id:
-                    team2_players = [get_player_name_from_id(player_id, player_data) for player_id in roster.get("starters", [])]
-                    break
+    readable_matchups = []
 
-            points = matchup.get("points", 0)
+    for matchup in matchups:
+        opponent = next(
+            (other for other in games.get(matchup.get("matchup_id"), []) if other["roster_id"] != matchup["roster_id"]),
+            None,
+        )
 
+        if opponent:
             readable_matchups.append({
-                "team1_name": team1_name,
-                "team2_name": team2_name,
-                "team1_players": team1_players,
-                "team2_players": team2_players,
-                "points": points
+                "team1_name": snapshot.team_name(matchup["roster_id"]),
+                "team2_name": snapshot.team_name(opponent["roster_id"]),
+                "team1_players": [get_player_name_from_id(player_id, registry) for player_id in matchup.get("starters") or []],
+                "team2_players": [get_player_name_from_id(player_id, registry) for player_id in opponent.get("starters") or []],
+                "points": matchup.get("points", 0)
             })
 
     return readable_matchups
 
 
-def get_player_scores(league, player_data, season_type, season, week, scoring_format="ppr"):
+def get_player_scores(snapshot, registry, season_type, season, week, scoring_format="ppr"):
     """Retrieve player scores and projections for a given week based on the league's scoring format."""
-    # Initialize Stats
-    stats = Stats()
-
     # Get stats for the specified week
-    week_stats = stats.get_week_stats(season_type, season, week)
+    week_stats = sleeper_api.get_week_stats(season_type, season, week)
 
     # Get projections for the specified week
-    week_projections = stats.get_week_projections(season_type, season, week)
+    week_projections = sleeper_api.get_week_projections(season_type, season, week)
 
     # List to hold player scores
     player_scores = []
 
     # Get matchups data
-    matchups = league.get_matchups(week)
+    matchups = snapshot.get_matchups(week)
 
     # Iterate over the matchups to fetch player data
     for matchup in matchups:
@@ -123,14 +173,14 @@ def get_player_scores(league, player_data, season_type, season, week, scoring_fo
 
         for player_id in players:
             # Get player score for the selected scoring format
-            player_score = stats.get_player_week_score(week_stats, player_id)
+            player_score = sleeper_api.get_player_week_score(week_stats, player_id)
             actual_score = player_score.get(f'pts_{scoring_format}', 0)  # Format: 'pts_ppr', 'pts_std', 'pts_half_ppr'
 
             # Get projected score for the selected scoring format
             projected_score = week_projections.get(str(player_id), {}).get(f'pts_{scoring_format}', 0)
 
-            # Get player name from player_data
-            player_name = get_player_name_from_id(player_id, player_data)
+            # Get player name from registry
+            player_name = get_player_name_from_id(player_id, registry)
 
             # Format and append player score data
             player_scores.append({
@@ -143,14 +193,9 @@ def get_player_scores(league, player_data, season_type, season, week, scoring_fo
     return player_scores
 
 
-def get_transactions(league, player_data, week):
+def get_transactions(snapshot, registry, week):
     """Retrieve league transactions for a specific week with readable player names and roster names."""
-    transactions = league.get_transactions(week)
-    rosters = league.get_rosters()
-    users = league.get_users()
-
-    # Map roster IDs to team names
-    roster_map = {roster["roster_id"]: get_team_name_from_roster_id(roster["roster_id"], league) for roster in rosters}
+    transactions = snapshot.get_transactions(week)
 
     readable_transactions = []
 
@@ -163,8 +208,8 @@ def get_transactions(league, player_data, week):
 
         # Add added players information
         for player_id, team_id in added_players.items():
-            player_name = get_player_name_from_id(player_id, player_data)
-            team_name = roster_map.get(team_id, "Unknown Team")
+            player_name = get_player_name_from_id(player_id, registry)
+            team_name = snapshot.team_name(team_id)
             readable_transactions.append({
                 "type": f"{transaction_type} (Added)",
                 "player": player_name,
@@ -173,8 +218,8 @@ def get_transactions(league, player_data, week):
 
         # Add dropped players information
         for player_id, team_id in dropped_players.items():
-            player_name = get_player_name_from_id(player_id, player_data)
-            team_name = roster_map.get(team_id, "Unknown Team")
+            player_name = get_player_name_from_id(player_id, registry)
+            team_name = snapshot.team_name(team_id)
             readable_transactions.append({
                 "type": f"{transaction_type} (Dropped)",
                 "player": player_name,
@@ -186,13 +231,11 @@ def get_transactions(league, player_data, week):
 
 def get_trending_players(sport="nfl", add_drop="add", hours=24, limit=25):
     """Retrieve trending players on the waiver wire with more detailed player information."""
-    players = Players()
-
     # Get all player data
-    player_data = players.get_all_players()
+    registry = players.get_registry()
 
     # Get trending players
-    trending_players = players.get_trending_players(sport=sport, add_drop=add_drop, hours=hours, limit=limit)
+    trending_players = sleeper_api.get_trending_players(sport=sport, add_drop=add_drop, hours=hours, limit=limit)
 
     trending_players_info = []
 
@@ -200,14 +243,14 @@ def get_trending_players(sport="nfl", add_drop="add", hours=24, limit=25):
         player_id = player.get("player_id")
 
         # Get player details from all players data
-        player_details = player_data.get(player_id)
+        player_details = registry.get(player_id)
 
         if player_details:
             player_info = {
                 "player_id": player_id,
-                "full_name": player_details.get("full_name", "Unknown"),
-                "team": player_details.get("team", "Unknown Team"),
-                "position": player_details.get("position", "Unknown"),
+                "full_name": player_details.full_name or "Unknown",
+                "team": player_details.team or "Unknown Team",
+                "position": player_details.position or "Unknown",
                 "trend_type": add_drop  # 'add' or 'drop'
             }
             trending_players_info.append(player_info)
@@ -215,17 +258,17 @@ def get_trending_players(sport="nfl", add_drop="add", hours=24, limit=25):
     return trending_players_info
 
 
-def get_league_settings(league):
+def get_league_settings(snapshot):
     """
     Retrieve important league settings and scoring type.
 
     Args:
-        league: Sleeper League object.
+        snapshot: LeagueSnapshot of the league.
 
     Returns:
         A dictionary containing key league settings.
     """
-    league_settings = league.get_league()
+    league_settings = snapshot.settings
 
     # Extract only the important settings
     key_settings = {
@@ -241,75 +284,97 @@ def get_league_settings(league):
     return key_settings
 
 
-def get_top_waiver_wire_players_by_position(league, season_type, season, week, player_data, top_n=10,
+def get_top_waiver_wire_players_by_position(snapshot, season_type, season, week, registry, top_n=10,
                                             scoring_format="ppr"):
     """
     Retrieve the top waiver wire players with the highest point projections for a given week, stratified by fantasy positions.
 
     Args:
-        league: Sleeper League object.
+        snapshot: LeagueSnapshot of the league.
         season_type: Type of season ("regular" or "post").
         season: The current season year.
         week: The week for which projections are needed.
-        player_data: Dictionary of all player data.
+        registry: PlayerRegistry of all players.
         top_n: Number of top players to return per position.
         scoring_format: Scoring format (e.g., "ppr").
 
     Returns:
         Dictionary stratified by fantasy position, each containing a list of top players and their projected points.
     """
-    from sleeper_wrapper import Stats
+    engine = waivers.get_waiver_engine(snapshot.league_id, week, season, season_type)
+    stratified_top_players = {}
+    for position, top_players in engine.top([week], top_n=top_n, scoring_format=scoring_format).items():
+        if not top_players:
+            continue
+        stratified_top_players[position] = []
+        for player_id, projected_points in top_players:
+            player = registry.get(player_id)
+            stratified_top_players[position].append({
+                "player_name": (player.full_name if player else None) or "Unknown",
+                "team": (player.team if player else None) or "Unknown Team",
+                "projected_points": projected_points
+            })
 
-    # Initialize Stats
-    stats = Stats()
+    return stratified_top_players
 
-    # Define valid fantasy positions
-    fantasy_positions = {"QB", "RB", "WR", "TE", "K", "DEF"}
 
-    # Get projections for the specified week
-    week_projections = stats.get_week_projections(season_type, season, week)
-
-    # Get league rosters to identify players already rostered
-    rosters = league.get_rosters()
-    rostered_players = {player_id for roster in rosters for player_id in roster.get("players", [])}
-
-    # Filter waiver wire players and get projections stratified by position
-    waiver_wire_projections = {}
-    for player_id, projection_data in week_projections.items():
-        if player_id not in rostered_players:
-            projected_points = projection_data.get(f"pts_{scoring_format}", 0)
-            player_name = player_data.get(player_id, {}).get("full_name", "Unknown")
-            team = player_data.get(player_id, {}).get("team", "Unknown Team")
-            position = player_data.get(player_id, {}).get("position", "Unknown")
-
-            if position in fantasy_positions:
-                if position not in waiver_wire_projections:
-                    waiver_wire_projections[position] = []
-
-                waiver_wire_projections[position].append({
-                    "player_name": player_name,
-                    "team": team,
-                    "projected_points": projected_points
-                })
-
-    # Sort and truncate the top N players for each position
-    stratified_top_players = {
-        position: sorted(players, key=lambda x: x["projected_points"], reverse=True)[:top_n]
-        for position, players in waiver_wire_projections.items()
-    }
+def get_opponent_roster(snapshot, roster_id, week):
+    """Gets the roster a team plays in a week, None on a bye or when the week has no matchups yet."""
+    matchups = snapshot.get_matchups(week)
+    matchup_id = next((m.get("matchup_id") for m in matchups if m.get("roster_id") == roster_id), None)
+    if matchup_id is None:
+        return None
+    opponent = next(
+        (m for m in matchups if m.get("matchup_id") == matchup_id and m.get("roster_id") != roster_id), None
+    )
+    return snapshot.roster_by_id.get(opponent["roster_id"]) if opponent else None
 
-    return stratified_top_players
 
+def get_projected_matchups(snapshot, week, scoring_format="ppr"):
+    """
+    Project every matchup of a week from the best lineup of each team.
 
-def get_league_info():
-    league_id = globals.get_league_id()
-    team_name = globals.get_team_name()
-    league = League(league_id)
+    Args:
+        snapshot: LeagueSnapshot of the league.
+        week: The week to project.
+        scoring_format: Scoring format (e.g., "ppr").
+
+    Returns:
+        A tuple of the optimal lineup of every roster id and a list of matchups, each a list of
+        (roster_id, projected points) pairs. Without matchups for the week every team is its own entry.
+    """
+    roster_positions = get_league_settings(snapshot)["roster_positions"]
+    best = lineups.optimal_lineups(snapshot.rosters, roster_positions, [week], scoring_format)
+
+    by_matchup = {}
+    for matchup in snapshot.get_matchups(week):
+        if matchup.get("matchup_id") is not None and matchup.get("roster_id") in best:
+            by_matchup.setdefault(matchup["matchup_id"], []).append(matchup["roster_id"])
+    groups = list(by_matchup.values()) or [[roster_id] for roster_id in best]
+    return best, [[(roster_id, best[roster_id]["points"]) for roster_id in group] for group in groups]
+
+
+def get_league_context(league_id, team_name, week=None):
+    """
+    Build the league description given to the LLM for one team
+
+    Only the user's team and their opponent of the week are listed with full rosters,
+    the other teams get one standings line each, so the prompt stays small in big leagues.
+
+    Args:
+        league_id: The Sleeper league id
+        team_name: Display name of the user's team
+        week: The week whose opponent is shown, defaults to the current week in globals
+
+    Returns:
+        A dictionary with the description under "info" and the league's "scoring_type" and "num_teams".
+    """
+    week = week or globals.get_week()
+    snapshot = get_league_snapshot(league_id)
 
     # Get league settings
-    league_settings = get_league_settings(league)
+    league_settings = get_league_settings(snapshot)
     scoring_type = league_settings.get("scoring_settings", {}).get("rec", "Unknown")
-    globals.set_scoring_type(scoring_type)
     num_teams = league_settings.get("num_teams", 0)
     playoff_week_start = league_settings.get("playoff_week_start", "Unknown")
     result = f"League is a {scoring_type} PPR, {num_teams}-team league.\n"
@@ -317,40 +382,48 @@ def get_league_info():
         result += f"Playoffs start in Week {playoff_week_start}.\n\n"
 
     # Get all player data
-    players = Players()
-    player_data = players.get_all_players()
-
-    # Fetch league users and their rosters
-    rosters = league.get_rosters()
-
-    # Highlight user's team
-    user_roster = get_team_roster(team_name, league, player_data)
-
+    registry = players.get_registry()
 
+    # Highlight user's team and this week's opponent
+    user_roster = snapshot.roster_for_team(team_name)
 
     if user_roster:
         result += f"Your Team: \n"
-        user_roster = [roster for roster in rosters if roster["roster_id"] == user_roster["roster_id"]][0]
-        result += stringify_roster(user_roster, league, player_data) + "\n\n"
+        result += stringify_roster(user_roster, snapshot, registry) + "\n\n"
+        opponent_roster = get_opponent_roster(snapshot, user_roster["roster_id"], week)
+        if opponent_roster:
+            result += f"Your Week {week} Opponent: \n"
+            result += stringify_roster(opponent_roster, snapshot, registry) + "\n\n"
     else:
         result += f"No team found with the name '{team_name}'.\n\n"
 
-    result += "Other Teams and Records:\n"
-    for roster in rosters:
-        if roster["roster_id"] == user_roster["roster_id"]:
-            continue
-        result += stringify_roster(roster, league, player_data) + "\n"
+    result += "Standings:\n"
+    for rank, team in enumerate(get_league_standings(snapshot, registry), start=1):
+        result += f"{rank}. {team['team_name']}: {team['wins']}-{team['losses']} record, {team['points_for']} points for\n"
+
+    return {"info": result, "scoring_type": scoring_type, "num_teams": num_teams}
+
 
-    return result
+def apply_league_context(context):
+    """Set the scoring type and league size used by the tools from a league context."""
+    globals.set_scoring_type(context["scoring_type"])
+    if context["num_teams"]:
+        globals.set_league_size(context["num_teams"])
+
+
+def get_league_info():
+    context = get_league_context(globals.get_league_id(), globals.get_team_name())
+    apply_league_context(context)
+    return context["info"]
 
 
-def stringify_roster(roster, league, player_data):
-    team_name = get_team_name_from_roster_id(roster["roster_id"], league)
+def stringify_roster(roster, snapshot, registry):
+    team_name = snapshot.team_name(roster["roster_id"])
     wins = roster.get("settings", {}).get("wins", 0)
     losses = roster.get("settings", {}).get("losses", 0)
     points_for = roster.get("settings", {}).get("fpts", 0)
     players_list = [
-        get_player_name_from_id(player_id, player_data) for player_id in roster.get("players", [])
+        get_player_name_from_id(player_id, registry) for player_id in roster.get("players") or []
     ]
 
     return f"{team_name}: {wins}-{losses} record, {points_for} points for\nRoster: {', '.join(players_list)}"
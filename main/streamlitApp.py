@@ -1,28 +1,58 @@
-import random
-import time
+import logging
+import os
 
 import streamlit as st
-from sleeper_wrapper import League
 
 import globals
+import telemetry
+from data.sleeper_api import CachedLeague
+from scrapers.sleeper import apply_league_context, get_league_context
 from agent import NFLAgent  # Import your agent class
 
+# How long league users and rosters are reused before they are fetched again
+LEAGUE_CACHE_TTL = 5 * 60
+
+@st.cache_resource
+def start_telemetry():
+    """Log level, trace file and metrics endpoint from LOG_LEVEL, FF_TRACE_FILE and FF_METRICS_PORT, set up once per server."""
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    telemetry.configure()
+    if os.getenv("FF_METRICS_PORT"):
+        telemetry.start_metrics_server(int(os.getenv("FF_METRICS_PORT")))
+
+
+start_telemetry()
+
 # Global variables to store league ID and team name
 global_league_id = None
 global_team_name = None
 
-# Streamed response emulator
-def response_generator():
-    response = random.choice(
-        [
-            "Hello there! How can I assist you today?",
-            "Hi, human! Is there anything I can help you with?",
-            "Do you need help?",
-        ]
-    )
-    for word in response.split():
-        yield word + " "
-        time.sleep(0.05)
+
+def stream_answer(agent, prompt, status):
+    """Yield answer tokens from the agent for st.write_stream, reporting tool progress in the status box."""
+    for event in agent.run_stream(prompt, verbose=True):
+        if event["type"] == "tool":
+            if event["status"] == "started":
+                status.update(label=f"Calling {event['name']}...")
+            else:
+                status.write(f"{event['name']}({', '.join(f'{k}={v}' for k, v in event['arguments'].items())}): {event['status']}")
+        elif event["type"] == "token":
+            yield event["content"]
+    status.update(label="Done", state="complete")
+
+
+@st.cache_data(ttl=LEAGUE_CACHE_TTL, show_spinner=False)
+def load_team_names(league_id):
+    """Display names of the teams in a league, shared by every session."""
+    users = CachedLeague(league_id).get_users() or []
+    return [user["display_name"] for user in users if "display_name" in user]
+
+
+@st.cache_data(ttl=LEAGUE_CACHE_TTL, show_spinner="Loading league...")
+def load_league_context(league_id, team_name):
+    """League description for one team, rebuilt only when the league or team changes or the ttl expires."""
+    return get_league_context(league_id, team_name)
+
 
 # Sidebar for league and team selection
 st.sidebar.title("Fantasy League Settings")
@@ -32,25 +62,28 @@ global_league_id = st.sidebar.text_input("Enter League ID", key="league_id")
 
 # Step 2: Fetch teams if League ID is provided
 if global_league_id:
-    # Initialize a temporary agent to fetch teams
-    league = League(global_league_id)
-    users = league.get_users()
+    display_names = load_team_names(global_league_id)
 
-    if users:
-        display_names = [user["display_name"] for user in users if "display_name" in user]
+    if display_names:
         # Step 3: Dropdown for team selection
         global_team_name = st.sidebar.selectbox("Select Your Team", display_names, key="team_name")
     else:
         st.sidebar.error("No teams found for this League ID. Please check and try again.")
         global_team_name = None
-else:
-    users = []
 
-# Initialize the NFLAgent if League ID and Team Name are provided
+# Keep one NFLAgent per browser session, only rebuilt when the league or team changes
 if global_league_id and global_team_name:
+    league_context = load_league_context(global_league_id, global_team_name)
     globals.set_league_id(global_league_id)
     globals.set_team_name(global_team_name)
-    nfl_agent = NFLAgent()
+    apply_league_context(league_context)
+
+    agent_key = (global_league_id, global_team_name)
+    if st.session_state.get("agent_key") != agent_key:
+        st.session_state.agent = NFLAgent(league_context=league_context["info"])
+        st.session_state.agent_key = agent_key
+        st.session_state.messages = []
+    nfl_agent = st.session_state.agent
 else:
     nfl_agent = None
 
@@ -81,11 +114,10 @@ if nfl_agent:
         with st.chat_message("user"):
             st.write(prompt)
 
-        # Use the agent to generate a response
-        response = nfl_agent.run(prompt, verbose=True)
-        print(response)
+        # Stream the agent's response as it is generated
         with st.chat_message("assistant"):
-            st.write(response)
+            status = st.status("Thinking...", expanded=False)
+            response = st.write_stream(stream_answer(nfl_agent, prompt, status))
         # Add assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "content": response})
 
@@ -0,0 +1,218 @@
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('telemetry_span', default=None)
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_trace_file = None
+
+# Aggregates behind the Prometheus endpoint
+_durations = {}
+_cache_status = {}
+_tokens = {'prompt': 0, 'completion': 0}
+
+recent_spans = deque(maxlen=1000)
+
+
+def new_id() -> str:
+    return f"{os.getpid():x}-{next(_ids):x}"
+
+
+class Span:
+    """
+    One timed operation: an LLM call, a tool call, a name lookup or a data fetch
+
+    Attributes set with set() end up in the trace. The attributes cache, bytes,
+    prompt_tokens and completion_tokens also feed the metrics.
+    """
+
+    __slots__ = ('name', 'target', 'span_id', 'parent_id', 'trace_id', 'start', 'duration', 'error', 'attrs')
+
+    def __init__(self, name, target=None, parent=None, trace_id=None, attrs=None):
+        self.name = name
+        self.target = target
+        self.span_id = new_id()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = trace_id or (parent.trace_id if parent is not None else self.span_id)
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self.attrs = dict(attrs or {})
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name, 'target': self.target, 'span_id': self.span_id, 'parent_id': self.parent_id,
+            'trace_id': self.trace_id, 'start': self.start, 'duration': self.duration, 'error': self.error,
+            **self.attrs,
+        }
+
+
+def _record(finished: Span):
+    key = (finished.name, finished.target or '')
+    with _lock:
+        stats = _durations.setdefault(key, {'count': 0, 'sum': 0.0, 'errors': 0, 'bytes': 0})
+        stats['count'] += 1
+        stats['sum'] += finished.duration
+        stats['errors'] += finished.error is not None
+        stats['bytes'] += finished.attrs.get('bytes', 0) or 0
+        if finished.attrs.get('cache'):
+            cache_key = (finished.name, finished.attrs['cache'])
+            _cache_status[cache_key] = _cache_status.get(cache_key, 0) + 1
+        _tokens['prompt'] += finished.attrs.get('prompt_tokens', 0) or 0
+        _tokens['completion'] += finished.attrs.get('completion_tokens', 0) or 0
+        recent_spans.append(finished)
+        if _trace_file is not None:
+            _trace_file.write(json.dumps(finished.to_dict(), default=str) + '\n')
+
+    logger.debug("%s %s %.1fms %s", finished.name, finished.target or '', finished.duration * 1000, finished.attrs)
+
+
+@contextmanager
+def span(name, target=None, parent=None, trace_id=None, **attrs):
+    """
+    Times the enclosed block as a span, nested spans become its children
+
+    Args:
+        name (str): The kind of operation, e.g. 'tool' or 'http.get'
+        target (str): What it operated on, e.g. the tool name or url path
+        parent (Span): The parent span, defaults to the current one
+        trace_id (str): Group the span under this trace instead of the parent's
+        **attrs: Extra attributes for the trace
+    """
+    current = Span(name, target, parent or _current.get(), trace_id, attrs)
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = repr(e)
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current.reset(token)
+        _record(current)
+
+
+def record(name, duration, target=None, parent=None, error=None, **attrs):
+    """Records an operation timed by the caller, for code that cannot wrap it in span(), e.g. across yields."""
+    finished = Span(name, target, parent or _current.get(), attrs=attrs)
+    finished.start = time.time() - duration
+    finished.duration = duration
+    finished.error = error
+    _record(finished)
+
+
+def finish(started: Span, error=None):
+    """Records a span created directly with Span(), timed from its creation."""
+    started.duration = time.time() - started.start
+    started.error = error
+    _record(started)
+
+
+def current_span():
+    return _current.get()
+
+
+def context_for(parent):
+    """A copy of the current context with parent as the current span, for work submitted to a thread pool."""
+    context = contextvars.copy_context()
+    context.run(_current.set, parent)
+    return context
+
+
+async def propagate(coro, parent):
+    """Runs a coroutine with parent as its current span, for work handed to another thread's event loop."""
+    token = _current.set(parent)
+    try:
+        return await coro
+    finally:
+        _current.reset(token)
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def render_metrics() -> str:
+    """Renders the aggregated spans in the Prometheus text exposition format."""
+    with _lock:
+        durations = {key: dict(value) for key, value in _durations.items()}
+        cache_status = dict(_cache_status)
+        tokens = dict(_tokens)
+
+    lines = [
+        '# HELP ff_span_duration_seconds Time spent in instrumented operations.',
+        '# TYPE ff_span_duration_seconds summary',
+    ]
+    for (name, target), stats in sorted(durations.items()):
+        labels = f'span="{_label(name)}",target="{_label(target)}"'
+        lines.append(f'ff_span_duration_seconds_count{{{labels}}} {stats["count"]}')
+        lines.append(f'ff_span_duration_seconds_sum{{{labels}}} {stats["sum"]:.6f}')
+    lines += ['# HELP ff_span_errors_total Instrumented operations that raised.', '# TYPE ff_span_errors_total counter']
+    for (name, target), stats in sorted(durations.items()):
+        lines.append(f'ff_span_errors_total{{span="{_label(name)}",target="{_label(target)}"}} {stats["errors"]}')
+    lines += ['# HELP ff_payload_bytes_total Bytes returned by instrumented operations.', '# TYPE ff_payload_bytes_total counter']
+    for (name, target), stats in sorted(durations.items()):
+        if stats['bytes']:
+            lines.append(f'ff_payload_bytes_total{{span="{_label(name)}",target="{_label(target)}"}} {stats["bytes"]}')
+    lines += ['# HELP ff_cache_lookups_total Cache lookups by outcome.', '# TYPE ff_cache_lookups_total counter']
+    for (name, status), count in sorted(cache_status.items()):
+        lines.append(f'ff_cache_lookups_total{{span="{_label(name)}",status="{_label(status)}"}} {count}')
+    lines += ['# HELP ff_llm_tokens_total Tokens used by LLM calls.', '# TYPE ff_llm_tokens_total counter']
+    for kind, count in tokens.items():
+        lines.append(f'ff_llm_tokens_total{{kind="{kind}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int = 9464) -> ThreadingHTTPServer:
+    """Serves render_metrics() at http://127.0.0.1:port/metrics from a background thread."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info("Serving metrics on http://127.0.0.1:%d/metrics", server.server_port)
+    return server
+
+
+def configure(trace_path: str = None):
+    """
+    Starts appending every finished span to a JSONL file
+
+    Args:
+        trace_path (str): The trace file, defaults to the FF_TRACE_FILE environment variable
+    """
+    global _trace_file
+    trace_path = trace_path or os.getenv("FF_TRACE_FILE")
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+        if trace_path:
+            _trace_file = open(trace_path, 'a', buffering=1)
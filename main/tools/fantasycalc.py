@@ -1,12 +1,24 @@
-import os
+import data.players as players
+import data.trades as trades
+from data.values import value_store
+import globals
+import scrapers.sleeper as sleeper
+import tools.utils as utils
 
-import nfl_data_py as nfl
-import pandas as pd
 
-import tools.utils as utils
+def _league_format() -> dict:
+    return {
+        'league_type': globals.get_league_type(),
+        'ppr': globals.get_scoring_type(),
+        'league_size': globals.get_league_size(),
+    }
+
+
+def _describe_value(player_name: str, record) -> str:
+    if record is None:
+        return "The value of " + player_name + " is either not available or equal to 0."
+    return "The value of " + player_name + " is " + str(record['value']) + " which is ranked " + str(record['overallRank']) + " at their position."
 
-stats = nfl.import_weekly_data([2024])
-ids = nfl.import_ids()
 
 def get_value(player_name: str) -> str:
     """
@@ -19,21 +31,66 @@ def get_value(player_name: str) -> str:
        int: The value of a player ranging from 0-10000
     """
     sleeper_id = utils.convert_player_name_to_sleeper_id(player_name)
-    
-    # read from csv file python
-    # df = pd.read_csv(f'fantasy_calc_rankings/{self.league_type_string}_{self.ppr_value}_{self.league_size}.csv', sep=';')
-    file_path = os.path.join(os.path.dirname(__file__), '..', 'fantasy_calc_rankings', 'fantasycalc_redraft_rankings.csv')
-    df = pd.read_csv(file_path, sep=';')
-    df = df[df['sleeperId'] == sleeper_id]
-
-    if df.empty:
-        return "The value of " + player_name + " is either not available or equal to 0."
+    return _describe_value(player_name, value_store.get_value(sleeper_id, **_league_format()))
+
+
+def get_values(player_names: str) -> str:
+    """
+    Gets the values of several fantasy football players at once, from fantasycalc.com
+
+    Args:
+      player_names (str): Comma-separated names of the players, for example "Travis Etienne,Travis Kelce"
+
+    Returns:
+       str: The value of each player ranging from 0-10000
+    """
+    if isinstance(player_names, str):
+        player_names = [name.strip() for name in player_names.split(",") if name.strip()]
+
+    sleeper_ids = [utils.convert_player_name_to_sleeper_id(name) for name in player_names]
+    records = value_store.get_values(sleeper_ids, **_league_format())
+    return "\n".join(_describe_value(name, record) for name, record in zip(player_names, records))
+
+def get_trade_suggestions(partner_team: str = "", top_n: int = 5) -> str:
+    """
+    Finds the 1-for-1, 2-for-1 and 2-for-2 trades that improve the user's lineup the most for the rest of the season
+
+    Args:
+      partner_team (str): The display name of a team to trade with, leave empty to search every team in the league
+      top_n (int): The number of trades to suggest
+
+    Returns:
+       str: The trades, best first, with the rest of season lineup points they add and the FantasyCalc value of each side
+    """
+    snapshot = sleeper.get_league_snapshot(globals.get_league_id())
+    roster = snapshot.roster_for_team(globals.get_team_name())
+    if roster is None:
+        return f"No team found with the name '{globals.get_team_name()}'."
+    partners = None
+    if partner_team:
+        partner = snapshot.roster_for_team(partner_team)
+        if partner is None:
+            return f"No team found with the name '{partner_team}'."
+        partners = [partner["roster_id"]]
 
-    # get the value and overallRank from the df
-    value = df['value'].iloc[0]
-    overallRank = df['overallRank'].iloc[0]
+    offers = trades.search_trades(
+        snapshot.rosters, snapshot.settings.get("roster_positions") or [], roster["roster_id"], globals.get_week(),
+        utils.convert_scoring_type_to_text(globals.get_scoring_type()), globals.get_season(),
+        top_n=max(1, int(top_n)), partners=partners, **_league_format(),
+    )
+    if not offers:
+        return "No fair trade found that improves your lineup."
 
-    return "The value of " + player_name + " is " + str(value) + " which is ranked " + str(overallRank) + " at their position."
+    registry = players.get_registry()
+    lines = ["Trades that add the most rest of season points to your best lineup:"]
+    for rank, offer in enumerate(offers, start=1):
+        give = " and ".join(registry.name(player_id, player_id) for player_id in offer["give"])
+        get = " and ".join(registry.name(player_id, player_id) for player_id in offer["get"])
+        lines.append(
+            f"{rank}. Trade {give} (value {offer['value_given']:.0f}) to {snapshot.team_name(offer['partner'])} "
+            f"for {get} (value {offer['value_received']:.0f}): +{offer['gain']:.1f} projected lineup points"
+        )
+    return "\n".join(lines)
 
 
 get_value_tool = {
@@ -49,4 +106,20 @@ get_value_tool = {
             },
         },
     },
-}
\ No newline at end of file
+}
+
+
+get_values_tool = {
+    'type': 'function',
+    'function': {
+        'name': 'get_values',
+        'description': 'Get the values of several players at once, for example every player in a trade',
+        'parameters': {
+            'type': 'object',
+            'required': ['player_names'],
+            'properties': {
+                'player_names': {'type': 'string', 'description': 'Comma-separated names of the players, for example "Travis Etienne,Travis Kelce"'},
+            },
+        },
+    },
+}
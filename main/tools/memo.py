@@ -0,0 +1,116 @@
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+import globals
+import telemetry
+import tools.utils as utils
+from data.versions import data_version
+
+MAX_RESULTS = 1024
+RESULT_TTL = 30 * 60
+# Arguments holding player names, resolved to canonical ids for the key
+PLAYER_ARGUMENTS = {'player_name', 'player_names'}
+
+
+def _normalize_argument(name, value):
+    if name == 'player_name':
+        return utils.canonical_player_id(utils.convert_player_name(str(value)))
+    if name == 'player_names':
+        names = [player_name.strip() for player_name in str(value).split(',') if player_name.strip()]
+        return tuple(utils.canonical_player_id(player_name) for player_name in utils.convert_player_names(names))
+    # Models pass numbers both as 4 and "4"
+    return str(value).strip()
+
+
+class ToolMemo:
+    """
+    Memoizes tool outputs, the tools are pure functions of their arguments and the data snapshot
+
+    The key is the tool name with its arguments, player names resolved to canonical
+    ids, so "CMC" and "Christian McCaffrey" share an entry. Every entry is dropped
+    when the week, the league format in globals or the data version changes, the
+    least recently used one goes first when the memo is full.
+
+    Args:
+        maxsize (int): Number of outputs kept
+        ttl (float): Seconds an output is reused for
+    """
+
+    def __init__(self, maxsize: int = MAX_RESULTS, ttl: float = RESULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._counters = {}
+        self.invalidations = 0
+
+    def _current_version(self) -> tuple:
+        return (
+            globals.get_week(), globals.get_scoring_type(), globals.get_league_type(), globals.get_league_size(),
+            data_version(),
+        )
+
+    def _count(self, name, counter):
+        self._counters.setdefault(name, {'hits': 0, 'misses': 0})[counter] += 1
+
+    def wrap(self, function):
+        """Gets a memoized version of a tool, it keeps the name, docstring and signature of the tool."""
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def memoized(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (function.__name__,) + tuple(
+                (name, _normalize_argument(name, value)) for name, value in bound.arguments.items()
+            )
+            version = self._current_version()
+            span = telemetry.current_span()
+
+            with self._lock:
+                if version != self._version:
+                    if self._entries:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self._version = version
+                entry = self._entries.get(key)
+                if entry is not None and time.time() - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._count(function.__name__, 'hits')
+                    if span is not None:
+                        span.set(cache='hit')
+                    return entry[1]
+                self._count(function.__name__, 'misses')
+
+            if span is not None:
+                span.set(cache='miss')
+            output = function(*args, **kwargs)
+            with self._lock:
+                if version == self._version:
+                    self._entries[key] = (time.time(), output)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            return output
+
+        return memoized
+
+    def stats(self) -> dict:
+        """Gets the hits and misses of every tool, the number of stored outputs and of invalidations."""
+        with self._lock:
+            return {
+                'tools': {name: dict(counters) for name, counters in self._counters.items()},
+                'size': len(self._entries),
+                'invalidations': self.invalidations,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+tool_memo = ToolMemo()
@@ -1,10 +1,32 @@
 import json
+import logging
 
-import nfl_data_py as nfl
-
+import data.stats as stats_engine
 import tools.utils as utils
 import globals
-stats = nfl.import_weekly_data([2024])
+
+logger = logging.getLogger(__name__)
+
+KEYS_TO_KEEP = ['recent_team', 'position', 'week', 'opponent_team', 'fantasy_points', 'passing_yards', 'passing_tds', 'interceptions', 'rushing_yards', 'rushing_tds', 'receptions', 'receiving_yards', 'receiving_tds', 'fantasy_points_ppr']
+# Stats shown for a position even when they are 0
+POSITION_KEYS = {
+    'QB': ['passing_yards', 'passing_tds', 'interceptions'],
+    'RB': ['rushing_yards', 'rushing_tds'],
+    'WR': ['receiving_yards', 'receiving_tds'],
+    'TE': ['receiving_yards', 'receiving_tds'],
+}
+COMPARE_COLUMNS = ['passing_yards', 'passing_tds', 'interceptions', 'carries', 'rushing_yards', 'rushing_tds', 'targets', 'receptions', 'receiving_yards', 'receiving_tds']
+
+
+def _points_column() -> str:
+    scoring_type = globals.get_scoring_type()
+    return 'fantasy_points' if scoring_type == 0.5 or scoring_type == 0 else 'fantasy_points_ppr'
+
+
+def _to_json_value(value):
+    # Stats are float32, round them so 24.3 is not printed as 24.299999237060547
+    return round(value, 2) if isinstance(value, float) else value
+
 
 def get_nfl_stats(player_name: str, num_games=4) -> str:
     """
@@ -17,49 +39,64 @@ def get_nfl_stats(player_name: str, num_games=4) -> str:
     Returns:
         str: The stats for the player
     """
-    print(player_name)
+    logger.debug("get_nfl_stats %s", player_name)
     player_name = utils.convert_player_name(player_name)
     num_games = int(num_games)
 
-    player_stats = stats[stats["player_display_name"] == player_name]
+    engine = stats_engine.get_stats_engine()
+    points_column = _points_column()
+    keys_to_keep = [key for key in KEYS_TO_KEEP if key in engine.frame and (not key.startswith('fantasy_points') or key == points_column)]
+    first_n_rows = engine.records(player_name, num_games, keys_to_keep)
 
-    if player_stats.empty:
+    if not first_n_rows:
         return player_name + " not found"
 
-    first_n_rows = player_stats.to_dict(orient='records')
-    first_n_rows.reverse()
-    first_n_rows = first_n_rows[:num_games]
-    scoring_type = globals.get_scoring_type()
-    keys_to_keep = ['recent_team', 'position', 'week', 'opponent_team', 'fantasy_points', 'passing_yards', 'passing_tds', 'interceptions', 'rushing_yards', 'rushing_tds', 'receptions', 'receiving_yards', 'receiving_tds', 'fantasy_points_ppr']
-
-    if scoring_type == 0.5 or scoring_type == 0:
-        keys_to_keep.remove('fantasy_points_ppr')
-    else:
-        keys_to_keep.remove('fantasy_points')
-
     stats_string = '\n'
     stats_string += f'---------- Recent Stats for {player_name} ----------\n'
     for elem in first_n_rows:
-        elem = {k: elem[k] for k in keys_to_keep}
-        # remove keys that are equal to 0 or None
-        keys_to_remove = [k for k, v in elem.items() if v == 0 or v is None]
-
-        for key in keys_to_remove:
-            if elem["position"] == "QB" and key in ["passing_yards", "passing_tds", "interceptions"]:
-                continue
-            if elem["position"] == "RB" and key in ["rushing_yards", "rushing_tds"]:
-                continue
-            if elem["position"] == "WR" and key in ["receiving_yards", "receiving_tds"]:
-                continue
-            if elem["position"] == "TE" and key in ["receiving_yards", "receiving_tds"]:
-                continue
-            elem.pop(key, None)
+        # Drop stats that are 0 or missing, except the ones that matter for the player's position
+        position_keys = POSITION_KEYS.get(elem['position'], [])
+        elem = {
+            key: _to_json_value(value) for key, value in elem.items()
+            if key in position_keys or not (value is None or value == 0 or value != value)
+        }
         stats_string += json.dumps(elem)
         stats_string += '\n'
+    average = engine.average(player_name, points_column, num_games)
+    stats_string += f'Average of {average:.2f} fantasy points over the last {len(first_n_rows)} games\n'
     stats_string += '-----------------------------------------------\n'
     return stats_string
 
 
+def compare_players(player_names: str, num_games=4) -> str:
+    """
+    Compares the per-game averages of several players over their last n games
+
+    Args:
+        player_names (str): Comma-separated names of the players, for example "Jordan Love,Deshaun Watson"
+        num_games (int): The number of games to average over
+
+    Returns:
+        str: One line of averages per player, the best scorer first
+    """
+    if isinstance(player_names, str):
+        player_names = [name.strip() for name in player_names.split(",") if name.strip()]
+    resolved = utils.convert_player_names(player_names)
+    num_games = int(num_games)
+
+    engine = stats_engine.get_stats_engine()
+    points_column = _points_column()
+    columns = [points_column] + [column for column in COMPARE_COLUMNS if column in engine.stat_columns]
+    averages = engine.averages(resolved, num_games, columns).sort_values(points_column, ascending=False)
+
+    lines = [f'---------- Averages over the last {num_games} games ----------']
+    for player, row in averages.iterrows():
+        stats = {column: round(float(row[column]), 2) for column in columns[1:] if row[column]}
+        lines.append(f"{player} ({row['position']}, {row['games']} games): {row[points_column]:.2f} fantasy points, {json.dumps(stats)}")
+    lines += [f'{name} not found' for name in resolved if name not in engine]
+    return '\n'.join(lines)
+
+
 get_nfl_stats_tool = {
     'type': 'function',
     'function': {
@@ -74,4 +111,21 @@ get_nfl_stats_tool = {
             },
         },
     },
+}
+
+
+compare_players_tool = {
+    'type': 'function',
+    'function': {
+        'name': 'compare_players',
+        'description': 'Compare the recent per-game averages of several players',
+        'parameters': {
+            'type': 'object',
+            'required': ['player_names'],
+            'properties': {
+                'player_names': {'type': 'string', 'description': 'Comma-separated names of the players, for example "Jordan Love,Deshaun Watson"'},
+                'num_games': {'type': 'integer', 'description': 'The number of games to average over'}
+            },
+        },
+    },
 }
\ No newline at end of file
@@ -0,0 +1,71 @@
+import data.projections as projections
+import data.schedule as schedule
+import data.stats as stats_engine
+import tools.utils as utils
+import globals
+
+
+def get_schedule_difficulty(player_name: str) -> str:
+    """
+    Gets the remaining schedule of a player with the difficulty and projected points of every game
+
+    Args:
+        player_name (str): The name of the player
+
+    Returns:
+        str: One line per remaining week with the opponent, the points it allows to the player's position and its rank
+    """
+    player_name = utils.convert_player_name(player_name)
+    latest = stats_engine.get_stats_engine().records(player_name, 1, ['recent_team', 'position'])
+    if not latest:
+        return player_name + " not found"
+    team, position = latest[0]['recent_team'], latest[0]['position']
+    if position not in schedule.POSITIONS:
+        return f"Schedule difficulty is only available for {', '.join(schedule.POSITIONS)}, {player_name} is a {position}."
+
+    scoring_format = utils.convert_scoring_type_to_text(globals.get_scoring_type())
+    strength = schedule.get_schedule_strength()
+    games = strength.remaining(team, position, globals.get_week(), 17, scoring_format)
+    if not games:
+        return f"No remaining games found for {player_name} ({team})."
+
+    sleeper_id = utils.convert_player_name_to_sleeper_id(player_name)
+    matrix = projections.get_projection_matrix(globals.get_season())
+    projected = {
+        game['week']: float(matrix.totals([game['week']], scoring_format, [sleeper_id])[0]) if sleeper_id else None
+        for game in games
+    }
+
+    lines = [f"---------- Remaining schedule for {player_name} ({team} {position}) ----------"]
+    for game in games:
+        line = f"Week {game['week']}: {'vs' if game['home'] else '@'} {game['opponent']}, "
+        if game['allowed'] == game['allowed']:
+            line += (f"allows {game['allowed']:.1f} points per game to {position}s "
+                     f"(rank {game['rank']} of {strength.teams}, {game['ratio']:.2f}x the average)")
+        else:
+            line += "no points allowed data"
+        if projected[game['week']] is not None:
+            line += f", projected {projected[game['week']]:.1f} points"
+        lines.append(line)
+
+    playoff_ratios = [game['ratio'] for game in games if game['week'] in projections.PLAYOFF_WEEKS and game['ratio'] == game['ratio']]
+    if playoff_ratios:
+        lines.append(f"Playoff weeks 15-17 average {sum(playoff_ratios) / len(playoff_ratios):.2f}x the points an average defense allows, "
+                     f"rank 1 is the easiest matchup.")
+    return "\n".join(lines)
+
+
+get_schedule_difficulty_tool = {
+    'type': 'function',
+    'function': {
+        'name': 'get_schedule_difficulty',
+        'description': 'Get the remaining schedule of a player with the difficulty and projected points of every game',
+        'parameters': {
+            'type': 'object',
+            'required': ['player_name'],
+            'properties': {
+                'player_name': {'type': 'string', 'description': 'The name of the player'},
+            },
+        },
+    },
+}
@@ -1,10 +1,20 @@
-from sleeper_wrapper import Stats, Players
+import logging
+
+import numpy as np
+
+import data.players as players
+import data.projections as projections
+import data.simulation as simulation
+import data.sleeper_api as sleeper_api
+import data.waivers as waivers
+import scrapers.sleeper as sleeper
 import tools.utils as utils
 from typing import List
 import globals
-player_data = Players().get_all_players()
 season_type = "regular"
 
+logger = logging.getLogger(__name__)
+
 def get_player_projected_points(player_name: str, season : int, weeks : str) -> str:
     """
     Retrieve the projected fantasy points for a specific player for the given match week.
@@ -37,14 +47,13 @@ def get_player_projected_points(player_name: str, season : int, weeks : str) ->
     "Player 'Nonexistent Player' not found."
     """
     player_name = utils.convert_player_name(player_name)
-    stats = Stats()
-    print(weeks)
+    logger.debug("get_player_projected_points %s %s %s", player_name, season, weeks)
     # convert comma-separated string to list of integers
     weeks = list(map(int, weeks.split(",")))
 
     player_id = utils.convert_player_name_to_sleeper_id(player_name)
 
-    if not player_id:
+    if player_id is None:
         return f"Player '{player_name}' not found."
     
     scoring_format = utils.convert_scoring_type_to_text(globals.get_scoring_type())
@@ -52,9 +61,11 @@ def get_player_projected_points(player_name: str, season : int, weeks : str) ->
     week_str = ""
 
 
+    # Fetch every week concurrently
+    week_payloads = sleeper_api.get_week_projections_many(season_type, season, weeks)
+
     for week in weeks:
-        print(season_type, season, week)
-        week_projections = stats.get_week_projections(season_type, season, week)
+        week_projections = week_payloads[week]
         projected_points = week_projections.get(str(player_id), {}).get(f"pts_{scoring_format}", 0)
         week_str += f"According to Sleeper, {player_name} is projected to score {projected_points} points in week {week}.\n"
 
@@ -103,22 +114,144 @@ def get_player_total_projected_points(player_name, season, current_week, total_w
     """
     player_name = utils.convert_player_name(player_name)
 
-    stats = Stats()
-    total_projected_points = 0
-
     # Find player ID from the name
-    player_id = next(
-        (pid for pid, pdata in player_data.items() if pdata.get("full_name").lower() == player_name.lower()), None)
+    player = players.get_registry().find(player_name)
 
-    if not player_id:
+    if player is None:
         return f"Player '{player_name}' not found."
 
-    for week in range(current_week, total_weeks + 1):
-        week_projections = stats.get_week_projections(season_type, season, week)
-        total_projected_points += week_projections.get(str(player_id), {}).get(f"pts_{scoring_format}", 0)
+    matrix = projections.get_projection_matrix(season, season_type)
+    return float(matrix.rest_of_season(current_week, total_weeks, scoring_format, [player.player_id])[0])
+
+
+def get_rest_of_season_projections(player_names: str) -> str:
+    """
+    Gets the projected points of players for the rest of the season and for the fantasy playoffs
+
+    Args:
+        player_names (str): Comma-separated names of the players, for example "Travis Etienne,Travis Kelce"
+
+    Returns:
+        str: Each player's projected points from the current week to week 17, in weeks 15-17 and their rank at their position
+    """
+    if isinstance(player_names, str):
+        player_names = [name.strip() for name in player_names.split(",") if name.strip()]
+    player_names = utils.convert_player_names(player_names)
+
+    registry = players.get_registry()
+    matrix = projections.get_projection_matrix(globals.get_season(), season_type)
+    scoring_format = utils.convert_scoring_type_to_text(globals.get_scoring_type())
+    current_week = globals.get_week()
+
+    # Totals of every player at once, the ranks compare against them
+    rest_of_season = matrix.rest_of_season(current_week, 17, scoring_format)
+    playoffs = matrix.playoffs(scoring_format)
+    positions = np.array([getattr(registry.get(player_id), 'position', None) for player_id in matrix.player_ids], dtype=object)
+
+    lines = []
+    for player_name in player_names:
+        player = registry.find(player_name)
+        row = matrix.index.get(player.player_id) if player is not None else None
+        if row is None:
+            lines.append(f"No projections found for {player_name}.")
+            continue
+        same_position = positions == player.position
+        rank = int((rest_of_season[same_position] > rest_of_season[row]).sum()) + 1
+        lines.append(
+            f"{player_name} is projected for {rest_of_season[row]:.1f} points from week {current_week} to week 17 "
+            f"(ranked {player.position}{rank}) and {playoffs[row]:.1f} points in the playoff weeks 15-17."
+        )
+    return "\n".join(lines)
+
 
-    return total_projected_points
 
+def get_waiver_targets(position: str = "", weeks: int = 1) -> str:
+    """
+    Gets the best free agents in the user's league by projected points over the next weeks
+
+    Args:
+        position (str): One of QB, RB, WR, TE, K or DEF, leave empty for every position
+        weeks (int): The number of weeks, starting with the current one, to sum projected points over
+
+    Returns:
+        str: The top free agents of each position with their projected points
+    """
+    positions = [position.strip().upper()] if position and position.strip() else None
+    if positions and positions[0] not in waivers.FANTASY_POSITIONS:
+        return f"Unknown position '{position}', use one of {', '.join(waivers.FANTASY_POSITIONS)}."
+    weeks = max(1, int(weeks))
+    current_week = globals.get_week()
+    horizon = range(current_week, min(current_week + weeks, 17 + 1))
+
+    engine = waivers.get_waiver_engine(globals.get_league_id(), current_week, globals.get_season(), season_type)
+    scoring_format = utils.convert_scoring_type_to_text(globals.get_scoring_type())
+    registry = players.get_registry()
+
+    lines = [f"Best free agents by projected points in weeks {horizon[0]}-{horizon[-1]}:"]
+    for top_position, top_players in engine.top(horizon, positions, top_n=5 if positions is None else 10, scoring_format=scoring_format).items():
+        names = [f"{registry.name(player_id, player_id)} ({points:.1f})" for player_id, points in top_players]
+        lines.append(f"{top_position}: {', '.join(names) if names else 'none'}")
+    return "\n".join(lines)
+
+def get_optimal_lineup(team_name: str = "", week: int = 0) -> str:
+    """
+    Gets the starting lineup with the most projected points for a team and the projected score of its matchup
+
+    Args:
+        team_name (str): The team's display name in the league, leave empty for the user's team
+        week (int): The week, 0 for the current week
+
+    Returns:
+        str: The best starter of every roster slot with projected points, the bench, and the projected matchup score
+    """
+    week = int(week) or globals.get_week()
+    snapshot = sleeper.get_league_snapshot(globals.get_league_id())
+    roster = snapshot.roster_for_team(team_name or globals.get_team_name())
+    if roster is None:
+        return f"No team found with the name '{team_name or globals.get_team_name()}'."
+
+    scoring_format = utils.convert_scoring_type_to_text(globals.get_scoring_type())
+    best, matchups = sleeper.get_projected_matchups(snapshot, week, scoring_format)
+    registry = players.get_registry()
+    lineup = best[roster["roster_id"]]
+
+    lines = [f"Best week {week} lineup for {snapshot.team_name(roster['roster_id'])} ({lineup['points']:.1f} projected points):"]
+    for slot, player_id, points in lineup["starters"]:
+        lines.append(f"{slot}: {registry.name(player_id, player_id)} ({points:.1f})" if player_id else f"{slot}: empty")
+    lines.append(f"Bench: {', '.join(registry.name(player_id, player_id) for player_id in lineup['bench']) or 'none'}")
+
+    matchup = next((group for group in matchups if roster["roster_id"] in dict(group)), [])
+    opponents = [(roster_id, points) for roster_id, points in matchup if roster_id != roster["roster_id"]]
+    for roster_id, points in opponents:
+        lines.append(f"Projected matchup: {lineup['points']:.1f} vs {snapshot.team_name(roster_id)} {points:.1f}, "
+                     f"both teams starting their best lineup.")
+    return "\n".join(lines)
+
+def get_playoff_odds(simulations: int = simulation.SIMULATIONS) -> str:
+    """
+    Gets the playoff, seed and championship probabilities of every team in the user's league
+
+    Args:
+        simulations (int): The number of seasons to simulate
+
+    Returns:
+        str: One line per team, best odds first, with its projected wins, playoff and title probabilities and its most likely seed
+    """
+    snapshot = sleeper.get_league_snapshot(globals.get_league_id())
+    scoring_format = utils.convert_scoring_type_to_text(globals.get_scoring_type())
+    model = simulation.build_season_model(snapshot, globals.get_week(), scoring_format, globals.get_season())
+    # Seeded by the rosters, the same league state always gives the same odds
+    odds = model.simulate(max(1000, int(simulations)), seed=int(snapshot.roster_hash, 16))
+
+    lines = [f"Odds from {max(1000, int(simulations))} simulated seasons, {model.playoff_teams} teams make the playoffs:"]
+    for team_id, team_odds in sorted(odds.items(), key=lambda item: (-item[1]['playoffs'], -item[1]['champion'])):
+        line = (f"{snapshot.team_name(team_id)}: {team_odds['wins']:.1f} projected wins, "
+                f"{team_odds['playoffs']:.1%} to make the playoffs, {team_odds['champion']:.1%} to win the title")
+        if team_odds['playoffs'] > 0:
+            seed = int(np.argmax(team_odds['seeds']))
+            line += f", most likely seed {seed + 1} ({team_odds['seeds'][seed]:.1%})"
+        lines.append(line)
+    return "\n".join(lines)
 
 
 get_player_projected_points_tool = {
@@ -1,32 +1,34 @@
-import nfl_data_py as nfl
-from fuzzywuzzy import process, fuzz
+from typing import Optional
 
-stats = nfl.import_weekly_data([2024])
+import data.ids as ids
+import data.names as names
+import telemetry
 
 def convert_player_name(player_name: str) -> str:
-    all_players_list = stats["player_display_name"].unique().tolist()
-
-    scores = process.extract(player_name, all_players_list, scorer=fuzz.token_set_ratio, limit=5)
-
-
-    print(scores[0], scores[1])
-
-    # if the similarity score is greater than 80, return the player name
-    if scores[0][1] > 50:
-        return scores[0][0]
-    else:
-        return player_name
+    """Resolve a free-form player name to the closest display name in the weekly stats."""
+    resolver = names.get_resolver()
+    with telemetry.span('name_resolution') as span:
+        # Comparing the lru counters is approximate when other threads resolve at the same time
+        hits = resolver.cache_info().hits
+        resolved = resolver.resolve(player_name)
+        span.set(query=player_name, resolved=resolved, cache='hit' if resolver.cache_info().hits > hits else 'miss')
+    return resolved
+
+
+def convert_player_names(player_names: list) -> list:
+    """Resolve a batch of free-form player names, see convert_player_name."""
+    with telemetry.span('name_resolution', names=len(player_names)):
+        return names.get_resolver().resolve_many(player_names)
     
 
-def convert_player_name_to_sleeper_id(player_name: str) -> int:
-    ids = nfl.import_ids()
+def convert_player_name_to_sleeper_id(player_name: str) -> Optional[int]:
+    """Resolve a player name to their Sleeper id, None if the player has no Sleeper id."""
     player_name = convert_player_name(player_name)
-    try:
-        sleeper_id = ids[ids["name"] == player_name]["sleeper_id"].iloc[0]
-    except IndexError:
-        return "The value of " + player_name + " is either not available or equal to 0."
+    return ids.get_crosswalk().sleeper_id(player_name)
 
-    return int(sleeper_id)
+def canonical_player_id(display_name: str) -> str:
+    """Gets a stable id for a resolved display name: the gsis id, or the name itself for players without one."""
+    return ids.get_crosswalk().convert(display_name, 'name', 'gsis_id') or display_name
 
 def convert_scoring_type_to_text(scoring_type: int) -> str:
     if scoring_type == 1: